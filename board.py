@@ -1,18 +1,148 @@
-from abc import ABC, abstractmethod
 from observer import Observable
-from copy import deepcopy
+from copy import copy
+from functools import lru_cache
+import random
+import re
+import sys
 
 
+@lru_cache(maxsize=None)
+def _lookupTables(size):
+    """
+    Tables to convert between labels (eg d5), grid references (r,c) and indexes in to the flat grid.
+    Built once for each board size and shared by all boards of that size. The labels are interned so the same
+    string object is used for a square everywhere it is handed out (and matches literals such as 'e4').
+    :param size: int - board size
+    :return: tuple (labelToGridRef, labelToIndex, gridRefToLabel, indexToLabel)
+    """
+    colOrdStart = ord('a')
+    gridRefToLabel = tuple(tuple(sys.intern(chr(colOrdStart + c) + str(size - r)) for c in range(size)) for r in range(size))
+    indexToLabel = tuple(label for row in gridRefToLabel for label in row)
+    labelToGridRef = dict()
+    labelToIndex = dict()
+    for index, label in enumerate(indexToLabel):
+        for l in (label, sys.intern(label.upper())):
+            labelToGridRef[l] = divmod(index, size)
+            labelToIndex[l] = index
+    return labelToGridRef, labelToIndex, gridRefToLabel, indexToLabel
+
+def labelToGridReferenceTable(size):
+    """
+    :param size: int - board size
+    :return: dict of the grid reference (r,c) for each label (eg d5 or D5). Shared by all users so must not be changed
+    """
+    return _lookupTables(size)[0]
+
+def labelToIndexTable(size):
+    """
+    :param size: int - board size
+    :return: dict of the index in to the flat grid (r * size + c) for each label (eg d5 or D5). Shared by all users so
+    must not be changed
+    """
+    return _lookupTables(size)[1]
+
+def bitboardIndexes(bb):
+    """
+    :param bb: int - bitboard
+    :return: list of int - the index of each set bit (square), lowest first
+    """
+    indexes = []
+    while bb:
+        bit = bb & -bb
+        bb ^= bit
+        indexes.append(bit.bit_length() - 1)
+    return indexes
+
+# number of squares set in a bitboard. int.bit_count is Python 3.10 on, earlier versions count the 1s in the binary string
+bitCount = int.bit_count if hasattr(int, 'bit_count') else lambda bb: bin(bb).count('1')
+
+def squaresBitboard(squares, size):
+    """
+    :param squares: iterable of labels (eg d5)
+    :param size: int - board size
+    :return: int with bit r * size + c set for each square (r,c). The same layout as a board's bitboards
+    """
+    labelToIndex = _lookupTables(size)[1]
+    bb = 0
+    for s in squares:
+        bb |= 1 << labelToIndex[s]
+    return bb
+
+@lru_cache(maxsize=None)
+def _rays(size, rcOffset):
+    """
+    The squares reached by repeatedly stepping rcOffset from each square until going off the board.
+    :return: tuple - for each index in to the flat grid a tuple of the indexes along the ray, nearest first
+    """
+    rays = []
+    for r in range(size):
+        for c in range(size):
+            ray = []
+            rr, cc = r + rcOffset[0], c + rcOffset[1]
+            while 0 <= rr < size and 0 <= cc < size:
+                ray.append(rr * size + cc)
+                rr, cc = rr + rcOffset[0], cc + rcOffset[1]
+            rays.append(tuple(ray))
+    return tuple(rays)
+
+@lru_cache(maxsize=None)
+def _raysFrom(size, rcOffsets):
+    """
+    _rays for several offsets grouped by square, so a piece can fetch all of its rays with one lookup.
+    :return: tuple - for each index in to the flat grid a tuple with the ray for each offset in rcOffsets
+    """
+    tables = [_rays(size, rcOffset) for rcOffset in rcOffsets]
+    return tuple(tuple(table[i] for table in tables) for i in range(size * size))
+
+@lru_cache(maxsize=None)
+def _stepsFrom(size, rcOffsets):
+    """
+    The squares a single step of each offset reaches from each square - the attack tables of pieces such as the knight
+    and king that don't slide.
+    :return: tuple - for each index in to the flat grid a tuple of the indexes reached, in rcOffsets order. Offsets
+    that go off the board are left out
+    """
+    return tuple(tuple(ray[0] for ray in rays if ray) for rays in _raysFrom(size, rcOffsets))
+
+# seeded so the hash of a position is the same every run
+_zobristRandom = random.Random(1863)
+
+@lru_cache(maxsize=None)
+def _zobristKeys(size, pieceClass, colour):
+    """
+    Random 64 bit keys, one per square, for a type and colour of piece. A position is hashed by XOR-ing together the
+    keys of each piece on its square (Zobrist hashing). This can be updated as pieces are added or removed rather than
+    rehashing the whole board.
+    :return: tuple of ints - one per square in flat grid order
+    """
+    return tuple(_zobristRandom.getrandbits(64) for i in range(size * size))
+
 class SquareChangeEvent():
+    __slots__ = ('row', 'col', 'content')
+
     def __init__(self, row, col, content):
         self.row = row
         self.col = col
         self.content = content
 
+class MoveEvent():
+    """
+    Used to indicate a piece has moved from one square to another. Replaces separate events for each square changed
+    """
+    __slots__ = ('fromRC', 'toRC', 'moving', 'captured')
+
+    def __init__(self, fromRC, toRC, moving, captured):
+        self.fromRC = fromRC
+        self.toRC = toRC
+        self.moving = moving
+        self.captured = captured
+
 class BoardChangeEvent():
     """
     Used to indicate the full board has changed - eg it's been reset
     """
+    __slots__ = ('board',)
+
     def __init__(self, board):
         self.board = board
 
@@ -24,86 +154,152 @@ class Board(Observable):
     Will need refactoring if board sizes great than 9 ever required as the parsing to and from
     matrix position and string code assumes single digits
     The board expects pieces to have methods:
-    setPosition(self, position) and position(self)
+    setPosition(self, position), position(self), isBlack(self) and scoreAt(self, index)
+    position() is only used by set to find where to put a new piece. make does not call setPosition, so position() is
+    stale for pieces moved by make and scoreAt is given the flat grid index the piece is on instead
     """
+    EMPTY = 0
+    WHITE = 1
+    BLACK = 2
+
     def __init__(self, size, grid=None):
         # do need option to pass in grid ? RE FACTOR - probably don't need this
         Observable.__init__(self)
         self._colOrdStart = ord('a')
         self._colOrdEnd = self._colOrdStart + size - 1
-        self._grid = grid if grid else [[None for c in range(size)] for r in range(size)]
+        # grid is held as a flat list indexed by row * size + col. This avoids the double indexing of a list of lists
+        self._grid = [None] * (size * size)
         self.size = size
+        # parallel lists to the grid holding the colour and score of the piece on each square. These let colour
+        # filtering and scoring run without calling back in to every piece
+        self._colours = [Board.EMPTY] * (size * size)
+        self._scores = [0] * (size * size)
+        # sum of _scores - kept up to date as pieces are placed so piecesScore doesn't add up the whole board
+        self._score = 0
+        self._hash = 0
+        # bitboards - an int per type and colour of piece with bit r * size + c set if such a piece is on that square.
+        # Plus one per colour, indexed like _colours
+        self._bitboards = {}
+        self._colourBitboards = [0, 0, 0]
+        if grid:
+            for i, p in enumerate(grid):
+                if p:
+                    self._place(i, p)
+        # set on copies of the board. Pieces are shared with the original board so must be copied before being moved
+        self._copyOnWrite = False
+        # string representation is cached until the board next changes. The column header and row separator
+        # never change so are built once here
+        self._str = None
+        self._header = ' |' + ''.join([f' {chr(c)} |' for c in range(self._colOrdStart, self._colOrdEnd + 1)]) + '\n'
+        self._separator = '-'*(size*4+4) + '\n'
+
+        # NB - every notify is guarded by 'if self._observers'. Copies of the board used when searching moves have no
+        # observers so this saves creating events that no one will receive
+
+        # lookup tables between labels (eg d5) and grid references so that the string parsing is only done once
+        self._labelToGridRef, self._labelToIndex, self._gridRefToLabel, self._indexToLabel = _lookupTables(size)
 
         # create regular expression to match moves. Do it here so only done once.
         r = r'[a-' + chr(self._colOrdEnd) + 'A-' + chr(self._colOrdEnd).upper() + ']'
         # add number range.
         r += '[1-' + str(size) + ']'
-        self._movePattern = r
+        self._movePattern = re.compile(r)
 
 
-    def movePattern(self): return self._movePattern
+    def movePattern(self):
+        """
+        :return: compiled regular expression matching a position on the board (eg d5)
+        """
+        return self._movePattern
 
     def __str__(self):
-        gridStr = '\n'
-        gridStr += ' |'
-        for c in range(self._colOrdStart, self._colOrdStart + len(self._grid)):
-            gridStr += f' {chr(c)} |'
-        gridStr += '\n'
-        gridStr += '-'*(len(self._grid)*4+4)
-        gridStr += '\n'
-
-        for r in range(len(self._grid)):
-            gridStr += f'{len(self._grid)-r}|'
-            for c in range(len(self._grid)):
-                piece = self._grid[r][c]
-                if piece == None:
-                    gridStr += '   |'
+        if self._str is None:
+            self._str = self._gridString()
+        return self._str
+
+    def _gridString(self):
+        separator = self._separator
+        parts = ['\n', self._header, separator]
+        for r in range(self.size):
+            parts.append(f'{self.size-r}|')
+            for c in range(self.size):
+                piece = self._grid[r * self.size + c]
+                if piece is None:
+                    parts.append('   |')
                 else:
-                    gridStr += f' {piece} |'
-            gridStr += str(len(self._grid)-r)
-            gridStr += '\n'
-            gridStr += '-'*(len(self._grid)*4+4)
-            gridStr += '\n'
-        gridStr += ' |'
-        for c in range(self._colOrdStart, self._colOrdStart + len(self._grid)):
-            gridStr += f' {chr(c)} |'
-        gridStr += '\n'
-        return gridStr
+                    parts.append(f' {piece} |')
+            parts.append(str(self.size-r))
+            parts.append('\n')
+            parts.append(separator)
+        parts.append(self._header)
+        return ''.join(parts)
 
     def piecesScore(self):
-        value = 0
-        for r in self._grid:
-            for c in r:
-                if c:
-                    value += c.score()
-        return value
+        return self._score
 
     def reset(self):
         """
         Sets all grid positions to 'None'
         :return: None
         """
-        self._grid = [[None for c in range(len(self._grid))] for r in range(len(self._grid))]
-        self.notify(BoardChangeEvent(self._grid))
+        self._grid = [None] * (self.size * self.size)
+        self._colours = [Board.EMPTY] * (self.size * self.size)
+        self._scores = [0] * (self.size * self.size)
+        self._score = 0
+        self._hash = 0
+        self._bitboards = {}
+        self._colourBitboards = [0, 0, 0]
+        self._str = None
+        if self._observers:
+            self.notify(BoardChangeEvent(self._grid))
+
+    def positionHash(self):
+        """
+        Hash of the pieces on the board. Two boards with the same types and colours of piece on the same squares
+        have the same hash.
+        :return: int
+        """
+        return self._hash
+
+    def bitboard(self, pieceClass, isBlack):
+        """
+        :param pieceClass: type of piece. Subclasses are not included
+        :param isBlack: colour of piece
+        :return: int with bit r * size + c set for each square (r, c) holding a piece of that type and colour
+        """
+        return self._bitboards.get((pieceClass, Board.BLACK if isBlack else Board.WHITE), 0)
+
+    def occupiedBitboard(self):
+        """
+        :return: int with bit r * size + c set for each square (r, c) that has a piece on it
+        """
+        return self._colourBitboards[Board.WHITE] | self._colourBitboards[Board.BLACK]
+
+    def colourBitboard(self, isBlack):
+        """
+        :return: int with bit r * size + c set for each square (r, c) that has a piece of the given colour on it
+        """
+        return self._colourBitboards[Board.BLACK if isBlack else Board.WHITE]
 
     def validColumns(self):
         """
         :return: str - Valid letters to represent a column
         """
-        return [chr(i) for i in range(self._colOrdStart, self._colOrdStart + len(self._grid))]
+        return [chr(i) for i in range(self._colOrdStart, self._colOrdStart + self.size)]
 
     def validRows(self):
         """
         Valid row numbers for use in position string
         :return: List of integers
         """
-        return [i for i in range(1, len(self._grid)+1)]
+        return [i for i in range(1, self.size+1)]
 
     def getRow(self, rowNumber):
         rowIndex = self.size - rowNumber
         if rowIndex < 0 or rowIndex >= self.size:
             raise ValueError(f'{rowNumber} is outside the range of rows: 1 - {self.size}')
-        return self._grid[rowIndex]
+        start = rowIndex * self.size
+        return self._grid[start:start + self.size]
 
     def setRow(self, row, index):
         """
@@ -112,13 +308,17 @@ class Board(Observable):
         :param index: index as per board referencing - ie based from 1 and goes bottom to top
         :return: None
         """
-        if len(row) != len(self._grid):
-            raise ValueError(f'Incorrect length row provided. Row of length {len(row)} but matrix is {len(self._grid)} x {len(self._grid)}')
+        if len(row) != self.size:
+            raise ValueError(f'Incorrect length row provided. Row of length {len(row)} but matrix is {self.size} x {self.size}')
         if index < 1 or index > self.size:
-            raise ValueError(f'Row index out of range. {index} supplied but matrix rows run from 1 to {len(self._grid)}')
+            raise ValueError(f'Row index out of range. {index} supplied but matrix rows run from 1 to {self.size}')
 
-        self._grid[self.size - index] = row
-        self.notify(BoardChangeEvent(self._grid))
+        start = (self.size - index) * self.size
+        for i, p in enumerate(row):
+            self._place(start + i, p)
+        self._str = None
+        if self._observers:
+            self.notify(BoardChangeEvent(self._grid))
 
     def set(self, piece):
         """
@@ -127,8 +327,10 @@ class Board(Observable):
         :return: None
         """
         gridP = self.labelToGridReference(piece.position())
-        self._grid[gridP[0]][gridP[1]] = piece
-        self.notify(SquareChangeEvent(gridP[0],gridP[1],piece))
+        self._place(gridP[0] * self.size + gridP[1], piece)
+        self._str = None
+        if self._observers:
+            self.notify(SquareChangeEvent(gridP[0],gridP[1],piece))
 
     def remove(self, atPosition):
         """
@@ -137,9 +339,12 @@ class Board(Observable):
         :return: the pieceAtLabel removed
         """
         gridP = self.labelToGridReference(atPosition)
-        piece = self._grid[gridP[0]][gridP[1]]
-        self._grid[gridP[0]][gridP[1]] = None
-        self.notify(SquareChangeEvent(gridP[0],gridP[1],None))
+        index = gridP[0] * self.size + gridP[1]
+        piece = self._grid[index]
+        self._place(index, None)
+        self._str = None
+        if self._observers:
+            self.notify(SquareChangeEvent(gridP[0],gridP[1],None))
         return piece
 
     def move(self, fromSquare, toSquare):
@@ -151,13 +356,64 @@ class Board(Observable):
         :param toSquare: game square as a position (eg d3)
         :return: AbstractPiece or None
         """
-        # note - no need to send notifications here as they are sent in the self.remove and self.set methods
-        moving = self.remove(fromSquare)
-        target = self.remove(toSquare)
+        fromRef = self.labelToGridReference(fromSquare)
+        toRef = self.labelToGridReference(toSquare)
+        fromIndex = fromRef[0] * self.size + fromRef[1]
+        toIndex = toRef[0] * self.size + toRef[1]
+        moving = self._grid[fromIndex]
+        target = self._grid[toIndex]
+        if self._copyOnWrite:
+            # piece may be shared with the board this was copied from. Don't want to move it on that board too
+            moving = copy(moving)
         moving.setPosition(toSquare)
-        self.set(moving)
+        self._place(fromIndex, None)
+        self._place(toIndex, moving)
+        self._str = None
+        if self._observers:
+            self.notify(MoveEvent(fromRef, toRef, moving, target))
         return target
 
+    def make(self, fromSquare, toSquare):
+        """
+        Moves the piece at fromSquare to toSquare so the position can be inspected and then put back with unmake.
+        Unlike move this sends no notifications and does not tell the piece it has moved, so piece.position() is
+        stale until unmake is called. Only the grid, colours, scores, bitboards and hash of the board change.
+        :param fromSquare: game square as a position (eg d3)
+        :param toSquare: game square as a position (eg d3)
+        :return: undo information to pass to unmake
+        """
+        fromIndex = self._labelIndex(fromSquare)
+        toIndex = self._labelIndex(toSquare)
+        moving = self._grid[fromIndex]
+        captured = self._grid[toIndex]
+        undo = (fromIndex, toIndex, moving, captured, self._str)
+        self._place(fromIndex, None)
+        self._place(toIndex, moving)
+        self._str = None
+        return undo
+
+    def scoreChange(self, fromSquare, toSquare):
+        """
+        How much piecesScore would change by if the piece at fromSquare were moved to toSquare, without moving it.
+        Only the two squares change so there's no need to make the move and score the whole board
+        :param fromSquare: game square as a position (eg d3)
+        :param toSquare: game square as a position (eg d3)
+        :return: signed int
+        """
+        fromIndex = self._labelIndex(fromSquare)
+        toIndex = self._labelIndex(toSquare)
+        return self._grid[fromIndex].scoreAt(toIndex) - self._scores[fromIndex] - self._scores[toIndex]
+
+    def unmake(self, undo):
+        """
+        Reverses a call to make. Calls must be unmade in the reverse order they were made
+        :param undo: as returned by make
+        :return: None
+        """
+        fromIndex, toIndex, moving, captured, self._str = undo
+        self._place(toIndex, captured)
+        self._place(fromIndex, moving)
+
     def pieceAtLabel(self, label):
         """
         Get the pieceAtLabel at a given position if any.
@@ -165,13 +421,19 @@ class Board(Observable):
         :return: AbstractPiece or None if square is empty or doesn't equist
         """
         if label:
-            g = self.labelToGridReference(label)
-            return self.pieceAtGridReference(g[0], g[1])
+            return self._grid[self._labelIndex(label)]
         else:
             return None
 
     def pieceAtGridReference(self, atRow, atCol):
-        return self._grid[atRow][atCol]
+        return self._grid[atRow * self.size + atCol]
+
+    def pieceAtIndex(self, index):
+        """
+        :param index: r * size + c for the square (r,c)
+        :return: AbstractPiece or None
+        """
+        return self._grid[index]
 
     def labelToGridReference(self, position):
         """
@@ -179,21 +441,24 @@ class Board(Observable):
         :param position: position code
         :return: tuple (r,c) - row column in matrix
         """
+        try:
+            return self._labelToGridRef[position]
+        except KeyError:
+            # not a valid label. Parse it to raise a helpful error
+            return self._parseLabel(position)
+
+    def _parseLabel(self, position):
         if len(position) != 2:
             raise ValueError('Positions on the board are represented by two characters the first a letter the second a digit')
-        else:
-            col = position[0].lower()
-            if ord(col) not in range(self._colOrdStart, self._colOrdStart + len(self._grid)):
+        # setting the 0x20 bit lower cases the column letter. Row digit is converted arithmetically to avoid int() raising
+        col = (ord(position[0]) | 0x20) - self._colOrdStart
+        row = self.size - (ord(position[1]) - ord('0'))
+        # any of these being negative means off the board. OR-ing them lets a single sign test check all four
+        if (col | row | (self.size - 1 - col) | (self.size - 1 - row)) < 0:
+            if (col | (self.size - 1 - col)) < 0:
                 raise ValueError(f'Invalid column. Valid columns are: {self.validColumns()}')
-            try:
-                row = len(self._grid) - int(position[1])
-            except:
-                raise ValueError(f'Invalid row. Valid rows are integers in the range: 1..{len(self._grid)}')
-            if row not in range(len(self._grid)):
-                raise ValueError(f'Invalid row. Valid rows are in the range: 1..{len(self._grid)}')
-            # colOrd = ord(col)
-            # newCol = colOrd - self._colOrdStart
-            return row, (ord(col) - self._colOrdStart)
+            raise ValueError(f'Invalid row. Valid rows are in the range: 1..{self.size}')
+        return row, col
 
     def gridReferenceToLabel(self, rcTuple):
         """
@@ -201,42 +466,107 @@ class Board(Observable):
         :param rcTuple: (r,c) representing row, col in matrix (as it's zero based)
         :return: string code
         """
-        positionStr = chr(self._colOrdStart + rcTuple[1])
-        r = len(self._grid) - rcTuple[0]
-        positionStr += str(r)
-        return positionStr
+        return self._gridRefToLabel[rcTuple[0]][rcTuple[1]]
+
+    def labels(self):
+        """
+        :return: tuple of the labels of every square (eg d5) in flat grid order - ie label of (r,c) is at r * size + c
+        """
+        return self._indexToLabel
+
+    def raysFrom(self, index, rcOffsets):
+        """
+        Squares in a straight line from a square in each of several directions. Used by pieces that slide in a
+        direction to avoid working out the positions one at a time.
+        :param index: r * size + c for the square (r,c)
+        :param rcOffsets: tuple of (r,c) steps. eg (1,1) is down a row and right a column
+        :return: tuple with, for each offset, a tuple of the indexes along the ray from the square, nearest first
+        """
+        return _raysFrom(self.size, rcOffsets)[index]
+
+    def stepsFrom(self, index, rcOffsets):
+        """
+        :param index: r * size + c for the square (r,c)
+        :param rcOffsets: tuple of (r,c) steps
+        :return: tuple of the indexes one step of each offset away from the square that are on the board
+        """
+        return _stepsFrom(self.size, rcOffsets)[index]
 
     def positionOffset(self, fromSquare, rcOffset):
         grid = self._positionXandYFrom(fromSquare, rcOffset)
         return grid
 
     def isEmpty(self,position):
-        return self.pieceAtLabel(position) == None
+        return self.pieceAtLabel(position) is None
 
     def isBlack(self,atPosition):
-        if self.isEmpty(atPosition): return None
-        else: return self.pieceAtLabel(atPosition).isBlack()
+        colour = self._colours[self._labelIndex(atPosition)]
+        if colour == Board.EMPTY: return None
+        else: return colour == Board.BLACK
 
     def piecesStillOnBoard(self):
-        pieces = []
-        for r in self._grid:
-            for p in r:
-                if p:
-                    pieces.append(p)
-        return pieces
+        return [p for p in self._grid if p]
 
     def piecesLeft(self, isBlack):
-        pOnBoard = self.piecesStillOnBoard()
-        pieces = [p for p in pOnBoard if p.isBlack() == isBlack]
-        return pieces
+        colour = Board.BLACK if isBlack else Board.WHITE
+        return [p for p, c in zip(self._grid, self._colours) if c == colour]
 
 
     def copyOfBoard(self):
         # NB - don't want to copy the observers. This is the reason moved from deepcopy. Need to think before overriding __deepcopy__
-        copyOfGrid = deepcopy(self._grid)
-        new = Board(self.size, copyOfGrid)
+        # The pieces themselves are not copied - the copy shares them and only copies a piece when it moves it. See move
+        new = Board(self.size)
+        new._grid = self._grid[:]
+        new._colours = self._colours[:]
+        new._scores = self._scores[:]
+        new._score = self._score
+        new._hash = self._hash
+        new._bitboards = self._bitboards.copy()
+        new._colourBitboards = self._colourBitboards[:]
+        new._copyOnWrite = True
         return new
 
+    def _labelIndex(self, label):
+        """
+        Index in to the flat grid for a label
+        :param label: position code (eg d5)
+        :return: int
+        """
+        try:
+            return self._labelToIndex[label]
+        except KeyError:
+            gridRef = self._parseLabel(label)
+            return gridRef[0] * self.size + gridRef[1]
+
+    def _place(self, index, piece):
+        """
+        Puts piece (or None to empty it) on the square at index in the flat grid and keeps the colours, scores, bitboards
+        and hash of the board in step. Does not send notifications.
+        """
+        bit = 1 << index
+        old = self._grid[index]
+        if old:
+            key = (type(old), self._colours[index])
+            self._bitboards[key] ^= bit
+            self._colourBitboards[key[1]] ^= bit
+            self._hash ^= _zobristKeys(self.size, *key)[index]
+        self._grid[index] = piece
+        if piece:
+            colour = Board.BLACK if piece.isBlack() else Board.WHITE
+            self._colours[index] = colour
+            # the piece's own position is stale on squares it was moved to by make
+            score = piece.scoreAt(index)
+            self._score += score - self._scores[index]
+            self._scores[index] = score
+            key = (type(piece), colour)
+            self._bitboards[key] = self._bitboards.get(key, 0) | bit
+            self._colourBitboards[colour] |= bit
+            self._hash ^= _zobristKeys(self.size, *key)[index]
+        else:
+            self._colours[index] = Board.EMPTY
+            self._score -= self._scores[index]
+            self._scores[index] = 0
+
     def _positionXandYFrom(self, square, rcTuple):
         """
         Returns the square c columns and r rows from square
@@ -248,7 +578,7 @@ class Board(Observable):
         gridRef = self.labelToGridReference(square)
         newRow = gridRef[0] + rcTuple[0]
         newCol = gridRef[1] + rcTuple[1]
-        if newRow < 0 or newCol < 0 or newRow >= len(self._grid) or newCol >= len(self._grid):
+        if newRow < 0 or newCol < 0 or newRow >= self.size or newCol >= self.size:
             return None
         else:
             return self.gridReferenceToLabel((newRow, newCol))
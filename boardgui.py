@@ -1,95 +1,117 @@
 import tkinter
 from observer import AbstractObserver
-from board import BoardChangeEvent, SquareChangeEvent
+from board import BoardChangeEvent, SquareChangeEvent, MoveEvent
+
+# squares in these events are given by their index in the board's flat grid, r * size + c
 
 class OutlineSquaresEvent:
-    def __init__(self, gridRefs, isInner, removeOutline=False):
-        self.gridRefs = gridRefs
+    __slots__ = ('indexes', 'isInner', 'removeOutline')
+
+    def __init__(self, indexes, isInner, removeOutline=False):
+        self.indexes = indexes
         self.isInner = isInner
         self.removeOutline = removeOutline
 
-class HighlightSquaresEvent:
-    def __init__(self, gridRefs, removeHighlight=False):
-        self.gridRefs = gridRefs
-        self.removeHighlight = removeHighlight
+class SelectionChangedEvent:
+    # the selected square and the squares its piece can move to. Sent as one event so they are redrawn together
+    __slots__ = ('selected', 'moveIndexes', 'removeSelection')
+
+    def __init__(self, selected, moveIndexes, removeSelection=False):
+        self.selected = selected
+        self.moveIndexes = moveIndexes
+        self.removeSelection = removeSelection
 
 class BoardCanvas(tkinter.Canvas, AbstractObserver):
 
+    # index returned for co-ordinates that are not on the board
+    OFF_BOARD = -1
+
     def __init__(self, master, size, squareSize=50, padding=15, colour1='lightyellow', colour2='lightblue', innerColour='green', outerColour='red'):
         canvasWidth = size * squareSize + padding*2
         canvasHeight = size * squareSize + padding*2
         tkinter.Canvas.__init__(self,master, width=canvasWidth, height=canvasHeight)
        # self.pack()
-        self._size = size
+        self.size = size
         self._squaresize = squareSize
         self._padding = padding
         self.colours = (colour1, colour2)
         self._innerColour = innerColour
         self._outerColour = outerColour
         self._displayGrid = []
+        # labels (eg d5) for each square, by index. Built once as there are only size x size of them
+        self.labels = tuple(f'{chr(ord("a") + c)}{size - r}' for r in range(size) for c in range(size))
+        # the same squares as _displayGrid but flattened in row order to match the Board's grid
+        self._squares = []
         self._createBoardCanvas()
         # self._boardCanvas.pack()
 
 
-    def gridRefFromCoordinates(self, x, y):
+    def indexFromCoordinates(self, x, y):
         """
-        This converts a x,y co-ordinate within the canvas to a r,c in the grid. If outside returns None
+        This converts a x,y co-ordinate within the canvas to the index, r * size + c, of the square in the grid
         :param x: x co-ordinate within canvas
         :param y: y co-ordinate within canvas
-        :return: Tuple (row, col) or none if x,y outside board
+        :return: int index of the square or OFF_BOARD if x,y outside board
         """
         r = (y - self._padding) // self._squaresize
         c = (x - self._padding) // self._squaresize
-        if r < self._size and c < self._size:
-            return (r,c)
-        else:
-            return None
-
-    def gridRefToLabel(self, gridRef):
-        r = str(self._size-gridRef[0])
-        c = chr(ord('a')+ gridRef[1])
-        return f'{c}{r}'
+        # clicks in the padding above or left of the board give negative r or c. Any of these being negative means
+        # off the board so OR-ing them lets a single sign test check all four bounds
+        if (r | c | (self.size - 1 - r) | (self.size - 1 - c)) < 0:
+            return BoardCanvas.OFF_BOARD
+        return r * self.size + c
 
     def objectChanged(self, data):
         if isinstance(data, BoardChangeEvent):
             self._displayPieces(data.board)
         if isinstance(data, SquareChangeEvent):
             self._displaySquare(data.row, data.col, data.content)
+        if isinstance(data, MoveEvent):
+            self._displaySquare(data.fromRC[0], data.fromRC[1], None)
+            self._displaySquare(data.toRC[0], data.toRC[1], data.moving)
         if isinstance(data, OutlineSquaresEvent):
             if data.removeOutline:
-                self._removeOutline(data.gridRefs, data.isInner)
-            else:
-                self._outline(data.gridRefs, data.isInner)
-        if isinstance(data, HighlightSquaresEvent):
-            if data.removeHighlight:
-                self._removeHighlight(data.gridRefs)
+                self._removeOutline(data.indexes, data.isInner)
             else:
-                self._highlight(data.gridRefs)
+                self._outline(data.indexes, data.isInner)
+        if isinstance(data, SelectionChangedEvent):
+            self._changeSelection(data.selected, data.moveIndexes, data.removeSelection)
+
+    def _outline(self, indexes, isInner):
+        squares = self._squares
+        if isInner:
+            self._configureItems([(squares[i].innerOutlineItem, 'state', tkinter.NORMAL) for i in indexes])
+        else:
+            self._configureItems([(squares[i].outerOutlineItem, 'state', tkinter.NORMAL) for i in indexes])
 
-    def _outline(self, gridRefs, isInner):
-        for (r,c) in gridRefs:
-            if isInner:
-                self._displayGrid[r][c].innerOutline()
-            else:
-                self._displayGrid[r][c].outerOutline()
-
-    def _removeOutline(self, gridRefs, isInner):
-        for (r,c) in gridRefs:
-            if r < len(self._displayGrid) and c < len(self._displayGrid):
-                if isInner:
-                    self._displayGrid[r][c].removeInnerOutline()
-                else:
-                    self._displayGrid[r][c].removeOuterOutline()
-
-    def _highlight(self, gridRefs):
-        for (r,c) in gridRefs:
-            if r < len(self._displayGrid) and c < len(self._displayGrid):
-                self._displayGrid[r][c].highlight()
-
-    def _removeHighlight(self, gridRefs):
-        for (r,c) in gridRefs:
-            if r < len(self._displayGrid) and c < len(self._displayGrid):
-                self._displayGrid[r][c].removeHighlight()
+    def _removeOutline(self, indexes, isInner):
+        squares = self._squares
+        if isInner:
+            self._configureItems([(squares[i].innerOutlineItem, 'state', tkinter.HIDDEN) for i in indexes])
+        else:
+            self._configureItems([(squares[i].outerOutlineItem, 'state', tkinter.HIDDEN) for i in indexes])
+
+    def _changeSelection(self, selected, moveIndexes, removeSelection):
+        # highlighting of the selected square and outlining of its moves go to Tcl in a single call
+        squares = self._squares
+        selectedSquares = [squares[selected]] if selected != BoardCanvas.OFF_BOARD else []
+        if removeSelection:
+            itemOptions = [(s.square, 'fill', s.colour) for s in selectedSquares]
+            itemOptions.extend([(squares[i].innerOutlineItem, 'state', tkinter.HIDDEN) for i in moveIndexes])
+        else:
+            innerColour = self._innerColour
+            itemOptions = [(s.square, 'fill', innerColour) for s in selectedSquares]
+            itemOptions.extend([(squares[i].innerOutlineItem, 'state', tkinter.NORMAL) for i in moveIndexes])
+        self._configureItems(itemOptions)
+
+    def _configureItems(self, itemOptions):
+        """
+        Configures a batch of canvas items in one call to Tcl rather than one itemconfigure call per item
+        :param itemOptions: list of tuples (itemId, option, value)
+        :return: None
+        """
+        if itemOptions:
+            self.tk.eval('\n'.join([f'{self._w} itemconfigure {i} -{o} {{{v}}}' for (i, o, v) in itemOptions]))
 
     def _displaySquare(self, row, col, content):
         square = self._displayGrid[row][col]
@@ -100,18 +122,13 @@ class BoardCanvas(tkinter.Canvas, AbstractObserver):
             square.removeContent(self)
 
     def _displayPieces(self, board):
-        row = 0
-        for r in self._displayGrid:
-            col = 0
-            for c in r:
-                piece = board[row][col]
-                if piece:
-                    c.show(str(piece), self)
-                else:
-                    c.clearString()
-                    c.removeContent(self)
-                col += 1
-            row += 1
+        # board is the flat grid from the Board so lines up square for square with self._squares
+        for square, piece in zip(self._squares, board):
+            if piece:
+                square.show(str(piece), self)
+            else:
+                square.clearString()
+                square.removeContent(self)
 
 
     def _createBoardCanvas(self):
@@ -119,24 +136,26 @@ class BoardCanvas(tkinter.Canvas, AbstractObserver):
         colour = 0
         rIndex = 0
         # create the grid of squares for display
-        for r in range(self._padding, self._padding + self._squaresize * self._size, self._squaresize):
+        for r in range(self._padding, self._padding + self._squaresize * self.size, self._squaresize):
             row = []
             cIndex = 0
             self._displayGrid.append(row)
-            for c in range(self._padding, self._padding + self._squaresize * self._size, self._squaresize):
+            for c in range(self._padding, self._padding + self._squaresize * self.size, self._squaresize):
                 # put in the numbers and letters
-                rStr = str(self._size - rIndex)
+                rStr = str(self.size - rIndex)
                 cStr = chr(ord('a') + cIndex)
                 if cIndex == 0:
                     self.create_text(c + self._squaresize * -0.17, r + self._squaresize * 0.5,
                                             text=rStr)
-                if rIndex == self._size - 1:
+                if rIndex == self.size - 1:
                     self.create_text(c + self._squaresize * 0.5, r + self._squaresize * 1.17,
                                             text=cStr)
-                row.append(BoardCanvas.Square(self, r, c, self._squaresize, self.colours[colour % 2], f'{cStr}{rStr}', self))
+                square = BoardCanvas.Square(self, r, c, self._squaresize, self.colours[colour % 2], f'{cStr}{rStr}', self)
+                row.append(square)
+                self._squares.append(square)
                 colour += 1
                 cIndex += 1
-            colour += 0 if (self._size % 2) else 1
+            colour += 0 if (self.size % 2) else 1
             rIndex += 1
 
         # return canvas
@@ -144,8 +163,12 @@ class BoardCanvas(tkinter.Canvas, AbstractObserver):
 
     class Square:
 
+        __slots__ = ('label', 'board', 'row', 'col', 'colour', 'size', 'canvas', 'square', 'outerOutlineItem',
+                     'innerOutlineItem', 'centre', 'content', '_string')
+
+        OUTLINE_WIDTH = 3
+
         def __init__(self, canvas, atR, atC, size, colour, label, board):
-            self.OUTLINE_WIDTH = 3
             self.label = label
             self.board = board
             self.row = atR
@@ -155,6 +178,18 @@ class BoardCanvas(tkinter.Canvas, AbstractObserver):
             self.canvas = canvas
             self.square = canvas.create_rectangle(self.col, self.row, self.col + self.size, self.row + self.size,
                                                   fill=self.colour, outline='black', width=self.OUTLINE_WIDTH)
+            # outlines are created once, hidden, and then shown / hidden as needed. Creating new canvas items each
+            # time means the canvas keeps growing for as long as the game goes on
+            self.outerOutlineItem = canvas.create_rectangle(self.col + self.OUTLINE_WIDTH, self.row + self.OUTLINE_WIDTH,
+                                                            self.col + self.size - self.OUTLINE_WIDTH,
+                                                            self.row + self.size - self.OUTLINE_WIDTH,
+                                                            outline=self.board._outerColour, width=self.OUTLINE_WIDTH,
+                                                            state=tkinter.HIDDEN)
+            self.innerOutlineItem = canvas.create_rectangle(self.col + self.OUTLINE_WIDTH * 2, self.row + self.OUTLINE_WIDTH * 2,
+                                                            self.col + self.size - self.OUTLINE_WIDTH * 2,
+                                                            self.row + self.size - self.OUTLINE_WIDTH * 2,
+                                                            outline=self.board._innerColour, width=self.OUTLINE_WIDTH,
+                                                            state=tkinter.HIDDEN)
             self.centre = (self.col + self.size / 2, self.row + self.size / 2)
             self.content = None
             self._string = ''
@@ -162,42 +197,6 @@ class BoardCanvas(tkinter.Canvas, AbstractObserver):
         def __str__(self):
             return self._string if self.content else ''
 
-        def outerOutline(self):
-            self.canvas.create_rectangle(self.col + self.OUTLINE_WIDTH, self.row + self.OUTLINE_WIDTH,
-                                         self.col + self.size - self.OUTLINE_WIDTH,
-                                         self.row + self.size - self.OUTLINE_WIDTH,
-                                         outline=self.board._outerColour, width=self.OUTLINE_WIDTH)
-
-        def removeOuterOutline(self):
-            self.canvas.create_rectangle(self.col + self.OUTLINE_WIDTH, self.row + self.OUTLINE_WIDTH,
-                                         self.col + self.size - self.OUTLINE_WIDTH,
-                                         self.row + self.size - self.OUTLINE_WIDTH,
-                                         outline=self.colour, width=self.OUTLINE_WIDTH)
-
-        def innerOutline(self):
-            self.canvas.create_rectangle(self.col + self.OUTLINE_WIDTH * 2, self.row + self.OUTLINE_WIDTH * 2,
-                                         self.col + self.size - self.OUTLINE_WIDTH * 2,
-                                         self.row + self.size - self.OUTLINE_WIDTH * 2,
-                                         outline=self.board._innerColour, width=self.OUTLINE_WIDTH)
-
-        def removeInnerOutline(self):
-            self.canvas.create_rectangle(self.col + self.OUTLINE_WIDTH * 2, self.row + self.OUTLINE_WIDTH * 2,
-                                         self.col + self.size - self.OUTLINE_WIDTH * 2,
-                                         self.row + self.size - self.OUTLINE_WIDTH * 2,
-                                         outline=self.colour, width=self.OUTLINE_WIDTH)
-
-        def highlight(self):
-            self.removeContent(self.canvas)
-            self.canvas.create_rectangle(self.col, self.row, self.col + self.size, self.row + self.size,
-                                         fill=self.board._innerColour)
-            self.show(self._string, self.canvas)
-
-        def removeHighlight(self):
-            self.removeContent(self.canvas)
-            self.canvas.create_rectangle(self.col, self.row, self.col + self.size, self.row + self.size,
-                                         fill=self.colour, outline='black', width=self.OUTLINE_WIDTH)
-            self.show(self._string, self.canvas)
-
         def show(self, string, canvas):
             self._string = string
             if self.content:
@@ -2,36 +2,38 @@ from observer import AbstractObserver
 from chessgame import ChessConstants, ChessGame, ChessMove, IncorrectPlayerError
 from chessplayers import HumanPlayerTerminal, HumanPlayerGUI, ComputerLevelZeroPlayer, ComputerLevelOnePlayer, ComputerLevelTwoPlayer, ChessPlayers
 from chessplayers import ComputerTreeSearchPlayer, ComputerTreeSearchAlphaBetaPlayer
-import sys, tkinter
+import sys, threading
 from abc import ABC, abstractmethod
-from chessview import ChessGUI
-from boardgui import BoardCanvas
 import logging
 
 class TerminalChessObserver(AbstractObserver):
+    __slots__ = ('_board',)
 
     def __init__(self, board):
         self._board = board
 
     def objectChanged(self, data):
-        if isinstance(data, dict):
-            for v in data.items():
-                if v[0] == ChessConstants.MOVE_MADE:
-                    player = v[1][ChessConstants.PLAYER]
-                    move = v[1][ChessConstants.MOVE]
-                    logging.info(f'{player}: {move}')
-                    logging.debug(self._board)
-                else:
-                    logging.info(v[1])
+        if not isinstance(data, dict):
+            return
+        moveMade = data.get(ChessConstants.MOVE_MADE)
+        if moveMade is not None:
+            logging.info(f'{moveMade[ChessConstants.PLAYER]}: {moveMade[ChessConstants.MOVE]}')
+            logging.debug(self._board)
+        else:
+            for v in data.values():
+                logging.info(v)
 
 
 class ChessController(ABC):
+    __slots__ = ()
 
     @abstractmethod
     def play(self):
         pass
 
 class TerminalChessGame(ChessController):
+    __slots__ = ('chessGame', '__debug')
+
     def __init__(self, chessGame, debug=False):
         self.chessGame = chessGame
         self.__debug = debug
@@ -114,21 +116,38 @@ class TerminalChessGame(ChessController):
             if quitGame:
                 break
 
+    # computer players for the fixed levels. Any other numeric level is an alpha beta search to that depth
+    LEVEL_PLAYERS = {'0': ComputerLevelZeroPlayer, '1': ComputerLevelOnePlayer, '2': ComputerLevelTwoPlayer}
+
     def __playerForLevel(self, level, isBlack):
-        if level == '0':
-            return ComputerLevelZeroPlayer(isBlack)
-        elif level == '1':
-            return ComputerLevelOnePlayer(isBlack)
-        elif level == '2':
+        playerClass = TerminalChessGame.LEVEL_PLAYERS.get(level)
+        if playerClass:
+            return playerClass(isBlack)
+        try:
+            l = int(level)
+            return ComputerTreeSearchAlphaBetaPlayer(isBlack, l, self.__debug)
+        except:
             return ComputerLevelTwoPlayer(isBlack)
-        else:
-            try:
-                l = int(level)
-                return ComputerTreeSearchAlphaBetaPlayer(isBlack, l, self.__debug)
-            except:
-                return ComputerLevelTwoPlayer(isBlack)
 
 class GUIChessController(ChessController, AbstractObserver):
+    __slots__ = ('root', 'gui', 'chessGame', '_p1', '_p2', '_helpIsShowingMoves', '_pawnPromoted', '_gameOver', '__debug',
+                 '_computerThinking', '_gameNumber')
+
+    # milliseconds between checks on whether the computer has chosen its move
+    POLL_INTERVAL = 20
+    GAME_OVER_EVENTS = frozenset((ChessConstants.STALEMATE, ChessConstants.WHITE_IN_CHECK_MATE,
+                                  ChessConstants.BLACK_IN_CHECK_MATE))
+    CHECK_EVENTS = frozenset((ChessConstants.BLACK_IN_CHECK_MATE, ChessConstants.WHITE_IN_CHECK_MATE,
+                              ChessConstants.WHITE_IN_CHECK, ChessConstants.BLACK_IN_CHECK))
+    # creates a player for each type that can be chosen in the GUI. Called with (isBlack, level, debug)
+    PLAYER_FACTORIES = {
+        ChessPlayers.HUMAN:                 lambda isBlack, level, debug: HumanPlayerGUI(isBlack),
+        ChessPlayers.COMPUTER_LEVEL0:       lambda isBlack, level, debug: ComputerLevelZeroPlayer(isBlack),
+        ChessPlayers.COMPUTER_LEVEL1:       lambda isBlack, level, debug: ComputerLevelOnePlayer(isBlack),
+        ChessPlayers.COMPUTER_LEVEL2:       lambda isBlack, level, debug: ComputerLevelTwoPlayer(isBlack),
+        ChessPlayers.COMPUTER_DEPTH:        lambda isBlack, level, debug: ComputerTreeSearchPlayer(isBlack, level),
+        ChessPlayers.COMPUTER_ALPHA_BETA:   lambda isBlack, level, debug: ComputerTreeSearchAlphaBetaPlayer(isBlack, level, debug),
+    }
 
     def __init__(self,gui, chessGame, root, debug=False):
         self.root = root
@@ -142,8 +161,10 @@ class GUIChessController(ChessController, AbstractObserver):
         self._gameOver = False
         chessGame.setPlayer1(self._p1)
         chessGame.setPlayer2(self._p2)
-        self.count = 0
         self.__debug = debug
+        self._computerThinking = False
+        # incremented for each new game so a move the computer was thinking about for an old game can be discarded
+        self._gameNumber = 0
 
 
     def moveCount(self):
@@ -151,6 +172,7 @@ class GUIChessController(ChessController, AbstractObserver):
 
     def play(self):
         self.chessGame.newGame()
+        self._gameNumber += 1
         self._gameOver = False
         firstPlayer = self.chessGame.playerToMove()
         self.gui.setPlayerLabel(str(firstPlayer))
@@ -165,14 +187,52 @@ class GUIChessController(ChessController, AbstractObserver):
             return
         player = self.chessGame.playerToMove()
         if not player.isHuman():
-            self.root.update() #ensure the GUI updates for move prior to thinking about next move
-            self.makeMove('')
+            if self._pawnPromoted:
+                # no searching to do - computer just picks its piece
+                self.makeMove('')
+            elif not self._computerThinking:
+                # search on a worker thread so the GUI keeps responding while the computer thinks. Only the choice
+                # of move is made there - the move itself is made back on the main thread as it updates the GUI.
+                # The search gets its own copy of the board so starting a new game can't change the board under it.
+                # The thread is a daemon so closing the window doesn't wait for a search to finish
+                self._computerThinking = True
+                result = []
+                thread = threading.Thread(target=self._searchForMove, daemon=True,
+                                          args=(player, self.chessGame._board.copyOfBoard(),
+                                                self.chessGame.availableMoves(player), self.chessGame.incheck(player),
+                                                result))
+                thread.start()
+                self.root.after(self.POLL_INTERVAL, self._checkForComputerMove, thread, result, self._gameNumber)
+
+    def _searchForMove(self, player, board, moves, inCheck, result):
+        # runs on the search thread. The chosen move, or the error raised, is handed back in result
+        try:
+            result.append(player.choseMove(board, moves, self.chessGame, inCheck))
+        except Exception as e:
+            result.append(e)
+
+    def _checkForComputerMove(self, thread, result, gameNumber):
+        if thread.is_alive():
+            self.root.after(self.POLL_INTERVAL, self._checkForComputerMove, thread, result, gameNumber)
+            return
+        self._computerThinking = False
+        if gameNumber != self._gameNumber:
+            # new game started while the computer was thinking so this move is no longer wanted. The new game's
+            # first player may be waiting on this search to finish before it can start
+            logging.debug('discarding computer move from previous game')
+            self.nextPlayer()
+            return
+        move = result[0]
+        if isinstance(move, Exception):
+            raise move
+        self._applyMove(self.chessGame.playerToMove(), move)
 
     def makeMove(self, moveString):
-        logging.debug(f'Pieces Score = {self.chessGame._board.piecesScore()}')
+        if self._computerThinking:
+            # computer is choosing its move. Ignore anything else till it's done
+            return
         if self.chessGame.status() == ChessConstants.STATUS_GAME_OVER:
             return
-        event = None
         cPlayer = self.chessGame.playerToMove()
         if self._pawnPromoted:
             cPlayer.setPromotePawnChoice(moveString, self.chessGame._boardAnalysis[ChessConstants.PAWN_PROMOTED].position())
@@ -180,11 +240,15 @@ class GUIChessController(ChessController, AbstractObserver):
         else:
             cPlayer.setChosenMove(moveString)
             move = cPlayer.choseMove(self.chessGame._board, self.chessGame.availableMoves(cPlayer), self.chessGame, self.chessGame.incheck(cPlayer))
+        return self._applyMove(cPlayer, move)
+
+    def _applyMove(self, cPlayer, move):
+        event = None
         if isinstance(move, ChessMove):
             event = self.chessGame.makeMove(cPlayer,move)
-            if (event == ChessConstants.STALEMATE
-                    or event == ChessConstants.WHITE_IN_CHECK_MATE
-                    or event == ChessConstants.BLACK_IN_CHECK_MATE):
+            if self.__debug:
+                logging.debug(f'Pieces Score = {self.chessGame._board.piecesScore()}')
+            if event in GUIChessController.GAME_OVER_EVENTS:
                 self._gameOver = True
                 return event
             if event == ChessConstants.PAWN_PROMOTED:
@@ -196,7 +260,7 @@ class GUIChessController(ChessController, AbstractObserver):
                 self._pawnPromoted = False
                 self.gui.pawnPromoted = False
                 self.gui.setPlayerLabel(str(self.chessGame.playerToMove()))
-                if event not in {ChessConstants.BLACK_IN_CHECK_MATE, ChessConstants.WHITE_IN_CHECK_MATE, ChessConstants.WHITE_IN_CHECK, ChessConstants.BLACK_IN_CHECK}:
+                if event not in GUIChessController.CHECK_EVENTS:
                     self.gui.setFeedbackLabel('')
             # self.gui.clearInput()
             self.gui.removeSelectedSquareHighlighting()
@@ -204,9 +268,12 @@ class GUIChessController(ChessController, AbstractObserver):
             self.gui.setHelpText('')
 
         if self.chessGame.nonHumanGame():
-            self.root.after(100, self.nextPlayer)
+            # once the board has been redrawn get the next computer move. No fixed delay so the game runs as fast
+            # as the computers choose their moves
+            self.root.after_idle(self.nextPlayer)
         elif not isinstance(self.chessGame.playerToMove(), HumanPlayerGUI):
             self.nextPlayer()
+        return event
 
 
 
@@ -221,40 +288,27 @@ class GUIChessController(ChessController, AbstractObserver):
         self.root.destroy()
 
     def newGame(self):
+        self._gameNumber += 1
         self.chessGame.newGame()
         self._gameOver = False
 
     def moves(self):
-        moves = self.chessGame.moveListForCurrentPlayer()
+        moves = self.chessGame.availableMoves(self.chessGame.playerToMove())
         logging.debug(moves)
 
     def setPlayer1(self, playerType, level=None):
-        if playerType == ChessPlayers.HUMAN:
-            self.chessGame.setPlayer1(HumanPlayerGUI(0))
-        elif playerType == ChessPlayers.COMPUTER_LEVEL0:
-            self.chessGame.setPlayer1(ComputerLevelZeroPlayer(0))
-        elif playerType == ChessPlayers.COMPUTER_LEVEL1:
-            self.chessGame.setPlayer1(ComputerLevelOnePlayer(0))
-        elif playerType == ChessPlayers.COMPUTER_LEVEL2:
-            self.chessGame.setPlayer1(ComputerLevelTwoPlayer(0))
-        elif playerType == ChessPlayers.COMPUTER_DEPTH:
-            self.chessGame.setPlayer1(ComputerTreeSearchPlayer(0, level if level else 1))
-        elif playerType == ChessPlayers.COMPUTER_ALPHA_BETA:
-            self.chessGame.setPlayer1(ComputerTreeSearchAlphaBetaPlayer(0, level if level else 1, self.__debug))
+        player = self._createPlayer(playerType, 0, level)
+        if player:
+            self.chessGame.setPlayer1(player)
 
     def setPlayer2(self, playerType,level=None):
-        if playerType == ChessPlayers.HUMAN:
-            self.chessGame.setPlayer2(HumanPlayerGUI(1))
-        elif playerType == ChessPlayers.COMPUTER_LEVEL0:
-            self.chessGame.setPlayer2(ComputerLevelZeroPlayer(1))
-        elif playerType == ChessPlayers.COMPUTER_LEVEL1:
-            self.chessGame.setPlayer2(ComputerLevelOnePlayer(1))
-        elif playerType == ChessPlayers.COMPUTER_LEVEL2:
-            self.chessGame.setPlayer2(ComputerLevelTwoPlayer(1))
-        elif playerType == ChessPlayers.COMPUTER_DEPTH:
-            self.chessGame.setPlayer2(ComputerTreeSearchPlayer(1,level if level else 1))
-        elif playerType == ChessPlayers.COMPUTER_ALPHA_BETA:
-            self.chessGame.setPlayer2(ComputerTreeSearchAlphaBetaPlayer(1, level if level else 1, self.__debug))
+        player = self._createPlayer(playerType, 1, level)
+        if player:
+            self.chessGame.setPlayer2(player)
+
+    def _createPlayer(self, playerType, isBlack, level):
+        factory = GUIChessController.PLAYER_FACTORIES.get(playerType)
+        return factory(isBlack, level if level else 1, self.__debug) if factory else None
 
     def setNames(self, p1Name, p2Name):
         self._p1.name = p1Name
@@ -267,17 +321,19 @@ class GUIChessController(ChessController, AbstractObserver):
 
     def getMoves(self):
         self._helpIsShowingMoves = 1
-        moves = self.chessGame.moveListForCurrentPlayer()
-        s = 'The following are valid moves:\n'
-        allowed = [m for m in moves if not m.disallowed]
-        for m in allowed:
-            s += str(m) + '\n'
-        disallowed = [m for m in moves if m.disallowed]
+        moves = self.chessGame.availableMoves(self.chessGame.playerToMove())
+        lines = ['The following are valid moves:']
+        disallowed = []
+        for m in moves:
+            if m.disallowed:
+                disallowed.append(str(m))
+            else:
+                lines.append(str(m))
         if len(disallowed)>0:
-            s += 'The following are disallowed:\n'
-            for m in disallowed:
-                s += str(m) + '\n'
-        return s
+            lines.append('The following are disallowed:')
+            lines.extend(disallowed)
+        lines.append('')
+        return '\n'.join(lines)
 
     def objectChanged(self, data):
         if ChessConstants.STATUS_GAME_OVER in data:
@@ -286,11 +342,17 @@ class GUIChessController(ChessController, AbstractObserver):
 
 def startTerminalMode(debug=False):
     chess = ChessGame()
-    chess.addObserver(TerminalChessObserver(chess._board))
+    # the game only holds a weak reference to its observers so this one is kept here for the length of the game
+    terminalObserver = TerminalChessObserver(chess._board)
+    chess.addObserver(terminalObserver)
     game = TerminalChessGame(chess, debug)
     game.play()
 
 def startGUIMode(debug=False):
+    # tkinter and the GUI modules are only imported once the GUI is wanted so terminal games don't load them
+    import tkinter
+    from chessview import ChessGUI
+
     root = tkinter.Tk()
     root.title('Chess')
 
@@ -301,8 +363,8 @@ def startGUIMode(debug=False):
 
     chess.addObserver(gui)
     chess.addObserver(terminalObserver)
+    # the terminal observer only logs game events so isn't added to the board - it would ignore every board event
     chess._board.addObserver(gui.boardCanvas)
-    chess._board.addObserver(terminalObserver)
 
     game = GUIChessController(gui, chess, root, debug)
     game.play()
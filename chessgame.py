@@ -1,6 +1,9 @@
 import board
-from chesspieces import Pawn, Bishop, Knight, Rook, Queen, King
-from observer import Observable, AbstractObserver
+from board import bitboardIndexes, bitCount
+from chesspieces import AbstractPiece, Pawn, Bishop, Knight, Rook, Queen, King
+from observer import Observable
+from collections import OrderedDict
+from functools import lru_cache
 import logging
 
 helptext = """
@@ -32,6 +35,11 @@ class ChessConstants:
     STALEMATE               = 'Game is a draw. No one wins'
     BLACK_MOVES             = 'Black moves'
     BLACK_CASTLING_MOVES    = 'Black Castling Moves'
+    WHITE_ATTACKS           = 'White attacks'
+    BLACK_ATTACKS           = 'Black attacks'
+    WHITE_SQUARES_BY_FROM   = 'White squares by from'
+    AVAILABLE_MOVES         = 'Available moves'
+    BLACK_SQUARES_BY_FROM   = 'Black squares by from'
     PAWN_PROMOTED           = 'Pawn Promoted'
     PROMOTION_OPTIONS       = {'Q','R','B','K'}
     CHECK                   = 'Check'     # think this should not be needed. REFACTOR - remove
@@ -56,6 +64,12 @@ class IncorrectPlayerError(ValueError):
     pass
 
 class ChessMove():
+    # many thousands of these are created when searching for moves. Slots keep them small and quick to create
+    __slots__ = ('fromSquare', 'toSquare', 'description', '_isBlack', 'disallowed', '_warning')
+
+    # row, col in matrix for each square. The board's table so it isn't worked out for every move created
+    SQUARE_TO_RC = board.labelToGridReferenceTable(8)
+
     def __init__(self, fromSquare, toSquare, description, isBlack, disallowed=False):
         self.fromSquare = fromSquare
         self.toSquare = toSquare
@@ -65,11 +79,33 @@ class ChessMove():
         # ie a move that would result in the king being in check. This is set externally as
         # moves have no concept of the rules of the game that is being played with them
         self.disallowed = disallowed
-        self.warning = None
-
-        # create tuples for row, col in matrix for the square
-        self.fromRC = (8-int(fromSquare[1]), ord(fromSquare[0])-ord('a'))
-        self.toRC = (8-int(toSquare[1]), ord(toSquare[0])-ord('a'))
+        self._warning = None
+
+    @property
+    def warning(self):
+        # the usual warning for a disallowed move is only built if someone asks for it
+        if self._warning is None and self.disallowed:
+            return f'Cannot make move {self.description}: {self.fromSquare}->{self.toSquare} as that would place / leave you in check.'
+        return self._warning
+
+    @warning.setter
+    def warning(self, warning):
+        self._warning = warning
+
+    @property
+    def fromRC(self):
+        return ChessMove._squareToRC(self.fromSquare)
+
+    @property
+    def toRC(self):
+        return ChessMove._squareToRC(self.toSquare)
+
+    @staticmethod
+    def _squareToRC(square):
+        rc = ChessMove.SQUARE_TO_RC.get(square)
+        if rc is None:
+            rc = (8-int(square[1]), ord(square[0])-ord('a'))
+        return rc
 
     def __str__(self):
         return f'{self.description}: {self.fromSquare}->{self.toSquare}'
@@ -81,6 +117,8 @@ class ChessMove():
         return False
 
 class PawnPromotion(ChessMove):
+    __slots__ = ('choice', '_promotedTo')
+
     def __init__(self, square, isBlack, choice):
         super().__init__(square, square, "Pawn Promotion", isBlack )
         self.choice = 'Q'
@@ -98,6 +136,8 @@ class PawnPromotion(ChessMove):
         return f'{self.description}: {self.fromSquare} promoted to {self._promotedTo}'
 
 class EnPassant(ChessMove):
+    __slots__ = ('removingPieceAtSquare', 'playWhoCanPlayEnPassant')
+
     def __init__(self, fromSquare, toSquare, isBlack, removingPieceAtSquare, playerWhoCanPlayEnPassant):
         super().__init__(fromSquare,toSquare, 'En Passant', isBlack)
         self.removingPieceAtSquare = removingPieceAtSquare
@@ -109,39 +149,53 @@ class EnPassant(ChessMove):
     def preChecked(self):
         return True
 
-class CastlingMove(ChessMove, AbstractObserver):
+class CastlingMove(ChessMove):
     """
-    Represents the castle move. It needs to observe the king and rook to make sure they haven't moved.
+    Represents the castle move. Whether the king and rook have moved is tracked by the game (see
+    ChessGame.CASTLING_RIGHTS_LOST) so these can be shared by every game.
     """
+    __slots__ = ('rookFrom', 'rookTo', '_emptyMask', '_safeMask', '_kingFromMask')
+
     def __init__(self, kingFrom, kingTo, rookFrom, rookTo,isBlack, positionsThatMustBeEmpty, positionsCannotBeBeingAttacked, description):
         # note we default this case to be disallowed=True
         ChessMove.__init__(self,kingFrom, kingTo, description, isBlack)
         self.rookFrom = rookFrom
         self.rookTo = rookTo
-        self._emptyPositions = positionsThatMustBeEmpty
-        self._positionsCannotBeBeingAttacked = positionsCannotBeBeingAttacked
-        self._noLongerPossible = False # this flag is toggled once the king or rook has moved
-
-    def objectChanged(self, theObjectThatChanged):
-        self._noLongerPossible = True
-
-    def isCastlingOn(self, positionsBeingAttacked, positionsEmpty):
-        if self._noLongerPossible:
-            return False # ie rook or king have moved
-        if not self._emptyPositions.issubset(positionsEmpty):
-            return False # squares between king and rook are not all empty
-        if self.fromSquare in positionsBeingAttacked:
-            return False # ie the king is in check
-        # now check that king won't pass through a square that is being attacked
-        if len(self._positionsCannotBeBeingAttacked.intersection(positionsBeingAttacked)) > 0:
-            return False # ie move would require passing through a square under attack
-
-        # PHEW! If we got this far without returning false. So lets return True !
-        return True
+        # held as bitboards so isCastlingOn is a few ANDs rather than set operations on labels
+        self._emptyMask = board.squaresBitboard(positionsThatMustBeEmpty, 8)
+        self._safeMask = board.squaresBitboard(positionsCannotBeBeingAttacked, 8)
+        self._kingFromMask = board.squaresBitboard((kingFrom,), 8)
+
+    def isCastlingOn(self, positionsBeingAttacked, positionsOccupied):
+        """
+        Assuming the king and rook haven't moved, castling is on if the squares between them are empty, the king is
+        not in check and the king doesn't pass through a square that is being attacked.
+        :param positionsBeingAttacked: bitboard of the squares the opponent can move to
+        :param positionsOccupied: bitboard of the squares with a piece on them
+        :return: True if this castling move can be made
+        """
+        return not (self._emptyMask & positionsOccupied
+                    or self._kingFromMask & positionsBeingAttacked
+                    or self._safeMask & positionsBeingAttacked)
 
 
 class ChessGame(Observable):
 
+    # number of positions whose move analysis is kept in the transposition table
+    TRANSPOSITION_TABLE_SIZE = 4096
+
+    # castling moves are the same in every game. Which are still possible is held in a bitmask with bit i
+    # for CASTLING_MOVES[i]
+    CASTLING_MOVES = (
+        CastlingMove('e1','g1','h1','f1', False, {'f1','g1'},{'f1','g1'},"White King Side Castling"),
+        CastlingMove('e1','c1','a1','d1', False, {'b1','c1','d1'},{'c1','d1'},"White Queen Side Castling"),
+        CastlingMove('e8','g8','h8','f8', True, {'f8','g8'},{'f8','g8'},"Black King Side Castling"),
+        CastlingMove('e8','c8','a8','d8', True, {'b8','c8','d8'},{'c8','d8'},"Black Queen Side Castling"))
+    ALL_CASTLING_RIGHTS = 0b1111
+    # castling rights lost when a piece moves from (or to) a square. ie the king or rook has moved (or the rook
+    # has been taken)
+    CASTLING_RIGHTS_LOST = {'e1': 0b0011, 'h1': 0b0001, 'a1': 0b0010, 'e8': 0b1100, 'h8': 0b0100, 'a8': 0b1000}
+
     def __init__(self):
         super().__init__()
         self._blackPieces = []
@@ -152,6 +206,8 @@ class ChessGame(Observable):
         self._board = board.Board(8)
         self._status = None
         self._basicMoveCalculator = BasicChessMoveCalculator()
+        self._transpositionTable = OrderedDict()
+        self._castlingRights = 0
 
     def status(self):
         return self._status
@@ -193,13 +249,8 @@ class ChessGame(Observable):
         """
         self._board.reset()
         self._moveCount = 0
+        self._castlingRights = ChessGame.ALL_CASTLING_RIGHTS
 
-        self._blackKingSideCastle = CastlingMove('e8','g8','h8','f8', True, {'f8','g8'},{'f8','g8'},"Black King Side Castling")
-        self._blackQueenSideCastle = CastlingMove('e8','c8','a8','d8', True, {'b8','c8','d8'},{'c8','d8'},"Black Queen Side Castling")
-        self._whiteKingSideCastle = CastlingMove('e1','g1','h1','f1', False, {'f1','g1'},{'f1','g1'},"White King Side Castling")
-        self._whiteQueenSideCastle = CastlingMove('e1','c1','a1','d1', False, {'b1','c1','d1'},{'c1','d1'},"White Queen Side Castling")
-
-        # pieces that need observing
         blackKing = King(1, 'e8')
         blackKingSideRook = Rook(1, 'h8')
         blackQueenSideRook = Rook(1, 'a8')
@@ -207,23 +258,12 @@ class ChessGame(Observable):
         whiteKingSideRook = Rook(0, 'h1')
         whiteQueenSideRook = Rook(0, 'a1')
 
-        # add observers
-        blackKing.addObserver(self._blackKingSideCastle)
-        blackKingSideRook.addObserver(self._blackKingSideCastle)
-
-        blackKing.addObserver(self._blackQueenSideCastle)
-        blackQueenSideRook.addObserver(self._blackQueenSideCastle)
-
-        whiteKing.addObserver(self._whiteKingSideCastle)
-        whiteKingSideRook.addObserver(self._whiteKingSideCastle)
-
-        whiteKing.addObserver(self._whiteQueenSideCastle)
-        whiteQueenSideRook.addObserver(self._whiteQueenSideCastle)
-
         # set white pawns
-        self._board.setRow([Pawn(0, chr(c)+str(2)) for c in range(ord('a'), ord('a') + self._board.size)],2)
+        size = self._board.size
+        labels = self._board.labels()
+        self._board.setRow([Pawn(0, l) for l in labels[(size - 2) * size:(size - 1) * size]],2)
         # set black pawns
-        self._board.setRow([Pawn(1, chr(c)+str(7)) for c in range(ord('a'), ord('a') + self._board.size)],7)
+        self._board.setRow([Pawn(1, l) for l in labels[size:2 * size]],7)
         #set white officers
         self._board.setRow([whiteQueenSideRook,Knight(0,'b1'),Bishop(0,'c1'),Queen(0,'d1'),whiteKing,Bishop(0,'f1'), Knight(0,'g1'), whiteKingSideRook],1)
         #set black officers
@@ -278,6 +318,8 @@ class ChessGame(Observable):
                 self.notify({ChessConstants.PROMOTION_DONE: move})
             else:
                 self._board.move(move.fromSquare, move.toSquare)
+                lost = ChessGame.CASTLING_RIGHTS_LOST
+                self._castlingRights &= ~(lost.get(move.fromSquare, 0) | lost.get(move.toSquare, 0))
                 self.notify({ChessConstants.MOVE: move})
                 if isinstance(move, EnPassant):
                     self._board.remove(move.removingPieceAtSquare)
@@ -317,15 +359,34 @@ class ChessGame(Observable):
     def availableSquares(self, forRow, andCol):
         piece = self._board.pieceAtGridReference(forRow, andCol)
         if piece:
-            allMoves = self.availableMoves(self.playerForSquare(forRow, andCol))
-            allRowCols = [(m.fromRC, m.toRC) for m in allMoves]
-            rowCols = [m[1] for m in allRowCols if m[0] == (forRow, andCol)]
-
-            return rowCols
+            # the GUI asks for these as the mouse moves over pieces. So index all the player's moves by the square they
+            # move from the first time and keep that with the analysis of the position
+            key = ChessConstants.BLACK_SQUARES_BY_FROM if piece.isBlack() else ChessConstants.WHITE_SQUARES_BY_FROM
+            squaresByFrom = self._boardAnalysis.get(key)
+            if squaresByFrom is None:
+                squaresByFrom = {}
+                for m in self.availableMoves(self.playerForSquare(forRow, andCol)):
+                    squaresByFrom.setdefault(m.fromRC, []).append(m.toRC)
+                self._boardAnalysis[key] = squaresByFrom
+            return list(squaresByFrom.get((forRow, andCol), ()))
         else:
             return None
 
     def availableMoves(self, forPlayer):
+        """
+        All the moves (including disallowed ones) for the player in the current position. The list is built once per
+        position and player and the same list returned each time so callers must not change it.
+        :param forPlayer: AbstractPlayer
+        :return: list of ChessMove
+        """
+        movesByPlayer = self._boardAnalysis.setdefault(ChessConstants.AVAILABLE_MOVES, {})
+        moves = movesByPlayer.get(forPlayer)
+        if moves is None:
+            moves = self._mergeAvailableMoves(forPlayer)
+            movesByPlayer[forPlayer] = moves
+        return moves
+
+    def _mergeAvailableMoves(self, forPlayer):
         moves = []
         if forPlayer.isBlack:
             moves.extend(self._boardAnalysis[ChessConstants.BLACK_MOVES])
@@ -361,68 +422,52 @@ class ChessGame(Observable):
 
     def _getEnPassant(self, move, board):
         pieceThatMoved = board.pieceAtLabel(move.toSquare)
-        if not isinstance(pieceThatMoved,Pawn) or (abs(int(move.fromSquare[1])-int(move.toSquare[1])) == 1):
+        if pieceThatMoved is None or pieceThatMoved.KIND != AbstractPiece.PAWN or (abs(int(move.fromSquare[1])-int(move.toSquare[1])) == 1):
             return []
         # know we've got a pawn that didn't move one row up or down.
         # so this is a candidate for En Passant rule
         # check piece either side of destination - if it's an oponnents pawn then en passant is an option
         epMoves = []
-        for i in [(0,1), (0,-1)]:
-            p = self._board.pieceAtLabel(board._positionXandYFrom(move.toSquare, i))
-            if p and p.isBlack() != pieceThatMoved.isBlack() and isinstance(p, Pawn):
-                # yeh we have it - en passant
-                fromSquare = p.position()
-
-                toSquare = board._positionXandYFrom(pieceThatMoved.position(),(1 if p.isBlack() else -1,0))
-                epMoves.append(EnPassant(fromSquare, toSquare, p.isBlack(), pieceThatMoved.position(), self._currentPlayer()))
+        labels = board.labels()
+        r, c = board.labelToGridReference(move.toSquare)
+        toIndex = r * board.size + c
+        for index in board.stepsFrom(toIndex, ((0,1), (0,-1))):
+            p = board.pieceAtIndex(index)
+            if p and p.isBlack() != pieceThatMoved.isBlack() and p.KIND == AbstractPiece.PAWN:
+                # yeh we have it - en passant. The taking pawn moves to the square the pawn that moved passed over
+                behind = board.stepsFrom(toIndex, ((1,0),) if p.isBlack() else ((-1,0),))
+                epMoves.append(EnPassant(labels[index], labels[behind[0]], p.isBlack(), pieceThatMoved.position(), self._currentPlayer()))
         return epMoves
 
     def _analyseBoard(self, board=None, move=None):
 
         gameBoard = board if board else self._board
-        sendNotifications = (board == None) # ie send notifications if analysing this objects game board
-
-        boardAnalysis = self._basicMoveCalculator.calculateMoves(gameBoard)
-
-        # check for Pawn promotion - check for pawns on end rows
-        promotedPawns = []
-        whitePromotionRow = gameBoard.getRow(8)
-        for i in whitePromotionRow:
-            if isinstance(i, Pawn) and not i.isBlack():
-                promotedPawns.append(i)
+        sendNotifications = (board is None) # ie send notifications if analysing this objects game board
 
-        blackPromotionRow = gameBoard.getRow(1)
-        for i in blackPromotionRow:
-            if isinstance(i,Pawn) and i.isBlack():
-                promotedPawns.append(i)
+        boardAnalysis = self._calculateMoves(gameBoard)
 
-        if len(promotedPawns) == 0:
+        # check for Pawn promotion - check for pawns on end rows. Row 8 is the first row of bits in the bitboards
+        # and row 1 the last
+        rowBits = (1 << gameBoard.size) - 1
+        promoted = (gameBoard.bitboard(Pawn, False) & rowBits
+                    | gameBoard.bitboard(Pawn, True) & rowBits << gameBoard.size * (gameBoard.size - 1))
+        if not promoted:
             boardAnalysis[ChessConstants.PAWN_PROMOTED] = None
-        elif len(promotedPawns) == 1:
-            boardAnalysis[ChessConstants.PAWN_PROMOTED] = promotedPawns[0]
+        elif not promoted & (promoted - 1):
+            # only one bit set
+            boardAnalysis[ChessConstants.PAWN_PROMOTED] = gameBoard.pieceAtIndex(promoted.bit_length() - 1)
         # we analyse board after every move so should only have one promoted pawn at most. More is a 'proper' error
         else:
-            raise ValueError(f"Somehow you've managed to get {len(promotedPawns)} at the same time. This should not be possible")
+            raise ValueError(f"Somehow you've managed to get {bitCount(promoted)} at the same time. This should not be possible")
 
         # check for castling
+        occupied = gameBoard.occupiedBitboard()
         # White first
-        whiteCastling = []
-        emptyFirstRankSquares = set([s for s in {'a1','b1','c1','d1','e1','f1','g1','h1'} if gameBoard.isEmpty(s)])
-        positionsBeingAttacked = set([s.toSquare for s in boardAnalysis[ChessConstants.BLACK_MOVES] if not s.disallowed])
-        if self._whiteKingSideCastle.isCastlingOn(positionsBeingAttacked,emptyFirstRankSquares):
-            whiteCastling.append(self._whiteKingSideCastle)
-        if self._whiteQueenSideCastle.isCastlingOn(positionsBeingAttacked, emptyFirstRankSquares):
-            whiteCastling.append(self._whiteQueenSideCastle)
+        whiteCastling = self._castlingMovesFor(False, boardAnalysis[ChessConstants.BLACK_ATTACKS], occupied)
         boardAnalysis[ChessConstants.WHITE_CASTLING_MOVES] = whiteCastling if len(whiteCastling) > 0 else None
 
         # Now Black
-        blackCastling = []
-        emptyFinalRankSquares = set([s for s in {'a8', 'b8', 'c8', 'd8', 'e8', 'f8', 'g8', 'h8'} if self._board.isEmpty(s)])
-        positionsBeingAttacked = set([s for s in boardAnalysis[ChessConstants.WHITE_MOVES] if not s.disallowed])
-        if self._blackKingSideCastle.isCastlingOn(positionsBeingAttacked, emptyFinalRankSquares):
-            blackCastling.append(self._blackKingSideCastle)
-        if self._blackQueenSideCastle.isCastlingOn(positionsBeingAttacked, emptyFinalRankSquares):
-            blackCastling.append(self._blackQueenSideCastle)
+        blackCastling = self._castlingMovesFor(True, boardAnalysis[ChessConstants.WHITE_ATTACKS], occupied)
         boardAnalysis[ChessConstants.BLACK_CASTLING_MOVES] = blackCastling if len(blackCastling) > 0 else None
 
         # En Passant
@@ -435,6 +480,33 @@ class ChessGame(Observable):
 
         return (interpretation, boardAnalysis)
 
+    def _castlingMovesFor(self, isBlack, positionsBeingAttacked, positionsOccupied):
+        """
+        :return: list of the castling moves the given colour can make
+        """
+        return [c for i, c in enumerate(ChessGame.CASTLING_MOVES)
+                if self._castlingRights & (1 << i) and c.isBlack() == isBlack
+                and c.isCastlingOn(positionsBeingAttacked, positionsOccupied)]
+
+    def _calculateMoves(self, gameBoard):
+        """
+        Moves and check status for both sides. The same position can be reached by different sequences of moves so
+        results are kept in a least recently used table keyed on the Zobrist hash of the board.
+        :param gameBoard: the board to analyse
+        :return: dict - as returned by BasicChessMoveCalculator.calculateMoves. A new dict on each call as the
+        caller adds entries to it
+        """
+        key = gameBoard.positionHash()
+        moveDict = self._transpositionTable.get(key)
+        if moveDict is None:
+            moveDict = self._basicMoveCalculator.calculateMoves(gameBoard)
+            self._transpositionTable[key] = moveDict
+            if len(self._transpositionTable) > ChessGame.TRANSPOSITION_TABLE_SIZE:
+                self._transpositionTable.popitem(last=False)
+        else:
+            self._transpositionTable.move_to_end(key)
+        return dict(moveDict)
+
     def _interpretAnalysis(self, boardAnalysis, board, sendNotifications):
         cPlayer = self._currentPlayer()
         if boardAnalysis[ChessConstants.PAWN_PROMOTED]:
@@ -491,57 +563,27 @@ class ChessGame(Observable):
         :param attackerIsBlack:
         :return: True for stalemate
         """
-        defendingPieces = board.piecesLeft(not attackerIsBlack)
-        if len(defendingPieces) > 1:
+        defendingPieces = board.colourBitboard(not attackerIsBlack)
+        if defendingPieces & (defendingPieces - 1):
             # defender not down to only it's king
             return False
-        attackingPieces = board.piecesLeft(attackerIsBlack)
-        if len(attackingPieces) > 3:
+        if bitCount(board.colourBitboard(attackerIsBlack)) > 3:
             # this could still be potentially by stalemate but won't check.
             return False
         else:
             # down to 3 or fewer pieces
-            remainingPieceTypes = [type(p) for p in attackingPieces]
-            if (Queen in remainingPieceTypes
-                    or Pawn in remainingPieceTypes
-                    or Rook in remainingPieceTypes
-                    or remainingPieceTypes.count(Bishop) > 1
-                    or (Knight in remainingPieceTypes and Bishop in remainingPieceTypes)):
+            bishops = board.bitboard(Bishop, attackerIsBlack)
+            if (board.bitboard(Queen, attackerIsBlack)
+                    or board.bitboard(Pawn, attackerIsBlack)
+                    or board.bitboard(Rook, attackerIsBlack)
+                    or bishops & (bishops - 1)
+                    or (board.bitboard(Knight, attackerIsBlack) and bishops)):
                 return False
             else:
                 return True
 
         return False
 
-    def _checkForCheck(self, board, attackerIsBlack):
-        # need to pass in the board here since when checking for checkmate need to  use a copy of the board so we can move on that and check with this method
-        attackingPieces = [p for p in board.piecesStillOnBoard() if p.isBlack() == attackerIsBlack]
-        defenderKing = [p for p in board.piecesStillOnBoard() if isinstance(p, King) and p.isBlack() != attackerIsBlack][0]
-        aSquares = set()
-        for p in attackingPieces:
-            if isinstance(p, Pawn):
-                # pawn can only take diagonally so can't check all moves
-                aSquares = aSquares.union(p.attackingSquares(board))
-            else:
-                aSquares = aSquares.union(p.availableSquares(board))
-
-        return defenderKing.position() in aSquares
-
-
-    def _movesWithThoseLeavingCheckDisallowed(self, board, isBlack):
-        moves = self._possibleMoves(isBlack)
-        for m in moves:
-            copyBoard = board.copyOfBoard()
-            copyBoard.move(m.fromSquare, m.toSquare)
-            if self._checkForCheck(copyBoard, not isBlack):
-                m.disallowed = True # since would put player in to check
-                pieceDescripton = self._board.pieceAtLabel(m.fromSquare).description()
-                m.warning = f'Cannot make move {pieceDescripton}: {m.fromSquare}->{m.toSquare} as that would place / leave you in check.'
-        return moves
-
-    def _possibleMoves(self, isBlack):
-        return self._basicMoveCalculator.possibleMoves(self._board, isBlack)
-
     def help(self):
 #         helptext = """
 # This chess app allows you to play against another person or against a computer.
@@ -557,6 +599,44 @@ class ChessGame(Observable):
 #         """
         return helptext
 
+@lru_cache(maxsize=None)
+def _attackTables(size):
+    """
+    Bitboards used to decide if a square is attacked. Square (r, c) is bit r * size + c, the same as the board's
+    bitboards, with row 0 the top of the board (black's back row).
+    :return: tuple (knightAttacks, kingAttacks, pawnAttackers, rookRays, bishopRays)
+    knightAttacks[i] and kingAttacks[i] - the squares a knight or king on square i attacks. As these moves are symmetric
+    they are also the squares a knight or king must be on to attack square i.
+    pawnAttackers[isBlack][i] - the squares a pawn of that colour must be on to attack square i.
+    rookRays[i] and bishopRays[i] - a tuple of (ray, increasing) for each direction a rook or bishop can slide from
+    square i. increasing is True if the bits in the ray get bigger moving away from i so the nearest piece on the ray
+    is its lowest set bit, otherwise it is the highest.
+    """
+    def bits(r, c, steps):
+        return sum(1 << (r + dr) * size + c + dc for dr, dc in steps if 0 <= r + dr < size and 0 <= c + dc < size)
+
+    def rays(r, c, directions):
+        result = []
+        for dr, dc in directions:
+            ray = 0
+            rr, cc = r + dr, c + dc
+            while 0 <= rr < size and 0 <= cc < size:
+                ray |= 1 << rr * size + cc
+                rr, cc = rr + dr, cc + dc
+            if ray:
+                result.append((ray, dr > 0 or (dr == 0 and dc > 0)))
+        return tuple(result)
+
+    squares = [(r, c) for r in range(size) for c in range(size)]
+    knightAttacks = tuple(bits(r, c, ((2,-1), (2,1), (1,-2), (1,2), (-1,-2), (-1,2), (-2,-1), (-2,1))) for r, c in squares)
+    kingAttacks = tuple(bits(r, c, ((1,0), (0,1), (-1,0), (0,-1), (1,1), (1,-1), (-1,1), (-1,-1))) for r, c in squares)
+    # white pawns attack up the board so to attack a square must be on the row below it. Black the opposite
+    pawnAttackers = (tuple(bits(r, c, ((1,1), (1,-1))) for r, c in squares),
+                     tuple(bits(r, c, ((-1,1), (-1,-1))) for r, c in squares))
+    rookRays = tuple(rays(r, c, ((1,0), (0,1), (-1,0), (0,-1))) for r, c in squares)
+    bishopRays = tuple(rays(r, c, ((1,1), (1,-1), (-1,1), (-1,-1))) for r, c in squares)
+    return knightAttacks, kingAttacks, pawnAttackers, rookRays, bishopRays
+
 class BasicChessMoveCalculator:
     def calculateMoves(self, gameBoard):
 
@@ -574,42 +654,177 @@ class BasicChessMoveCalculator:
                     len([x for x in moveDict[ChessConstants.BLACK_MOVES] if not x.disallowed]) == 0
                     and moveDict[ChessConstants.BLACK_IN_CHECK])
 
+        # squares each side can move to. Used to decide if the other side can castle
+        moveDict[ChessConstants.WHITE_ATTACKS] = board.squaresBitboard(
+                    (m.toSquare for m in moveDict[ChessConstants.WHITE_MOVES] if not m.disallowed), gameBoard.size)
+        moveDict[ChessConstants.BLACK_ATTACKS] = board.squaresBitboard(
+                    (m.toSquare for m in moveDict[ChessConstants.BLACK_MOVES] if not m.disallowed), gameBoard.size)
+
         return moveDict
 
     def possibleMoves(self, board, isBlack):
-        pieces = [p for p in board.piecesStillOnBoard() if p.isBlack() == isBlack]
+        """
+        Every move the pieces of the player can make, without checking whether it leaves their king in check. None of
+        the moves are marked disallowed so callers searching moves don't need to filter them
+        :param board: board to find moves on
+        :param isBlack: player to find moves for
+        :return: list of ChessMove
+        """
+        labels = board.labels()
         moves = []
-        for p in pieces:
-            am = p.availableSquares(board)
-            if len(am) == 0: continue
-            for m in am:
-                moves.append(ChessMove(p.position(), m, p.description(), isBlack))
+        pieces = board.colourBitboard(isBlack)
+        # the moves of all the pawns are worked out together
+        pawnMoves = Pawn.movesBitboards(board.bitboard(Pawn, isBlack), board.occupiedBitboard(),
+                                        board.colourBitboard(not isBlack), isBlack)
+        for index in bitboardIndexes(pieces):
+            p = board.pieceAtIndex(index)
+            fromSquare = labels[index]
+            description = p.description()
+            if p.KIND == AbstractPiece.PAWN:
+                toIndexes = Pawn.indexesFrom(index, isBlack, pawnMoves)
+            else:
+                toIndexes = p.availableIndexesFrom(board, index)
+            for to in toIndexes:
+                moves.append(ChessMove(fromSquare, labels[to], description, isBlack))
         return moves
 
+    def isInCheck(self, board, isBlack):
+        """
+        :param board: board to look at
+        :param isBlack: colour of the king
+        :return: True if the player's king is attacked. False if not or if the player has no king - as can happen to
+        the boards of a search, which doesn't check moves are legal
+        """
+        if not board.bitboard(King, isBlack):
+            return False
+        return self._checkForCheck(board, not isBlack)
+
     def _checkForCheck(self, board, attackerIsBlack):
         # need to pass in the board here since when checking for checkmate need to  use a copy of the board so we can move on that and check with this method
-        attackingPieces = [p for p in board.piecesStillOnBoard() if p.isBlack() == attackerIsBlack]
-        defenderKing = [p for p in board.piecesStillOnBoard() if isinstance(p, King) and p.isBlack() != attackerIsBlack][0]
-        aSquares = set()
-        for p in attackingPieces:
-            if isinstance(p, Pawn):
-                # pawn can only take diagonally so can't check all moves
-                aSquares = aSquares.union(p.attackingSquares(board))
-            else:
-                aSquares = aSquares.union(p.availableSquares(board))
+        # Works back from the defending king using the board's bitboards: eg the king is attacked by a knight if there
+        # is an attacking knight on any square a knight on the king's square could move to
+        knightAttacks, kingAttacks, pawnAttackers, rookRays, bishopRays = _attackTables(board.size)
+        defenderKing = board.bitboard(King, not attackerIsBlack)
+        if not defenderKing:
+            raise ValueError(f"No {'White' if attackerIsBlack else 'Black'} King on the board")
+        kingIndex = defenderKing.bit_length() - 1
+        if (knightAttacks[kingIndex] & board.bitboard(Knight, attackerIsBlack)
+                or kingAttacks[kingIndex] & board.bitboard(King, attackerIsBlack)
+                or pawnAttackers[bool(attackerIsBlack)][kingIndex] & board.bitboard(Pawn, attackerIsBlack)):
+            return True
+
+        # sliding pieces - the nearest piece along each ray from the king must be a rook / bishop or queen
+        queens = board.bitboard(Queen, attackerIsBlack)
+        occupied = board.occupiedBitboard()
+        for sliders, rays in ((board.bitboard(Rook, attackerIsBlack) | queens, rookRays[kingIndex]),
+                              (board.bitboard(Bishop, attackerIsBlack) | queens, bishopRays[kingIndex])):
+            if not sliders:
+                continue
+            for ray, increasing in rays:
+                blockers = ray & occupied
+                if blockers:
+                    nearest = blockers & -blockers if increasing else 1 << (blockers.bit_length() - 1)
+                    if nearest & sliders:
+                        return True
+        return False
 
-        return defenderKing.position() in aSquares
 
+    def _computePins(self, board, isBlack):
+        """
+        Finds the pieces of the given colour that are pinned to their king - ie moving them off the line between the
+        king and an attacking rook, bishop or queen would expose the king.
+        :return: dict of {square index of pinned piece: bitboard of the squares it can move to and stay on the line}
+        """
+        knightAttacks, kingAttacks, pawnAttackers, rookRays, bishopRays = _attackTables(board.size)
+        kingIndex = board.bitboard(King, isBlack).bit_length() - 1
+        own = board.colourBitboard(isBlack)
+        occupied = board.occupiedBitboard()
+        queens = board.bitboard(Queen, not isBlack)
+        pins = {}
+        for sliders, rays in ((board.bitboard(Rook, not isBlack) | queens, rookRays[kingIndex]),
+                              (board.bitboard(Bishop, not isBlack) | queens, bishopRays[kingIndex])):
+            if not sliders:
+                continue
+            for ray, increasing in rays:
+                blockers = ray & occupied
+                if not blockers:
+                    continue
+                nearest = blockers & -blockers if increasing else 1 << (blockers.bit_length() - 1)
+                if not nearest & own:
+                    continue
+                blockers ^= nearest
+                if not blockers:
+                    continue
+                pinner = blockers & -blockers if increasing else 1 << (blockers.bit_length() - 1)
+                if pinner & sliders:
+                    # squares from the king up to and including the pinning piece
+                    line = ray & ((pinner << 1) - 1) if increasing else ray & -pinner
+                    pins[nearest.bit_length() - 1] = line
+        return pins
+
+    def _attackedSquares(self, board, attackerIsBlack, occupied):
+        """
+        All the squares attacked by one side in a single bitboard.
+        :param occupied: bitboard of the squares that block sliding pieces
+        :return: int - bitboard
+        """
+        knightAttacks, kingAttacks, pawnAttackers, rookRays, bishopRays = _attackTables(board.size)
+        attacked = 0
+        # a pawn of one colour attacks the squares a pawn of the other colour would need to be on to attack it
+        for bb, table in ((board.bitboard(Knight, attackerIsBlack), knightAttacks),
+                          (board.bitboard(King, attackerIsBlack), kingAttacks),
+                          (board.bitboard(Pawn, attackerIsBlack), pawnAttackers[not attackerIsBlack])):
+            while bb:
+                bit = bb & -bb
+                bb ^= bit
+                attacked |= table[bit.bit_length() - 1]
+        queens = board.bitboard(Queen, attackerIsBlack)
+        for bb, rayTable in ((board.bitboard(Rook, attackerIsBlack) | queens, rookRays),
+                             (board.bitboard(Bishop, attackerIsBlack) | queens, bishopRays)):
+            while bb:
+                bit = bb & -bb
+                bb ^= bit
+                for ray, increasing in rayTable[bit.bit_length() - 1]:
+                    blockers = ray & occupied
+                    if blockers:
+                        # up to and including the nearest piece on the ray
+                        if increasing:
+                            ray &= ((blockers & -blockers) << 1) - 1
+                        else:
+                            ray &= -(1 << (blockers.bit_length() - 1))
+                    attacked |= ray
+        return attacked
 
     def _movesWithThoseLeavingCheckDisallowed(self, board, isBlack):
         moves = self.possibleMoves(board, isBlack)
+        # If not in check only a king move or moving a pinned piece off its line can leave the king in check.
+        # Other moves need no test
+        alreadyInCheck = self._checkForCheck(board, not isBlack)
+        pins = None if alreadyInCheck else self._computePins(board, isBlack)
+        king = board.bitboard(King, isBlack)
+        # all king moves are checked against one map of attacked squares. The king is taken off the board for this
+        # so a square behind it on a line from an attacking rook / bishop / queen is still attacked
+        attacked = self._attackedSquares(board, not isBlack, board.occupiedBitboard() ^ king)
         for m in moves:
-            copyBoard = board.copyOfBoard()
-            copyBoard.move(m.fromSquare, m.toSquare)
-            if self._checkForCheck(copyBoard, not isBlack):
-                m.disallowed = True # since would put player in to check
-                pieceDescripton = board.pieceAtLabel(m.fromSquare).description()
-                m.warning = f'Cannot make move {pieceDescripton}: {m.fromSquare}->{m.toSquare} as that would place / leave you in check.'
+            fromRef = board.labelToGridReference(m.fromSquare)
+            fromIndex = fromRef[0] * board.size + fromRef[1]
+            toRef = board.labelToGridReference(m.toSquare)
+            toBit = 1 << toRef[0] * board.size + toRef[1]
+            if (1 << fromIndex) & king:
+                inCheck = toBit & attacked
+            elif pins is not None:
+                line = pins.get(fromIndex)
+                if line is None:
+                    continue
+                inCheck = not toBit & line
+            else:
+                # try the move on the board itself and undo it rather than copying the board for every move.
+                # _checkForCheck only uses the board's bitboards so doesn't need pieces to know they've moved
+                undo = board.make(m.fromSquare, m.toSquare)
+                inCheck = self._checkForCheck(board, not isBlack)
+                board.unmake(undo)
+            if inCheck:
+                m.disallowed = True # since would put player in to check. ChessMove.warning gives the reason
         return moves
 
 
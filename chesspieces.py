@@ -1,5 +1,21 @@
 from observer import Observable
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from board import labelToIndexTable
+
+# index in to the flat grid (r * 8 + c) for each position label. The board's own table
+_POSITION_TO_INDEX = labelToIndexTable(8)
+
+@lru_cache(maxsize=None)
+def _scoreTable(pieceClass, isBlack):
+    """
+    The full score (base score plus square adjustment) of a piece of the class and colour on each square, so scoring a
+    piece is a single lookup
+    :return: tuple of int - one per square in flat grid order
+    """
+    base = -pieceClass.BASE_SCORE if isBlack else pieceClass.BASE_SCORE
+    adjustments = pieceClass._BLACK_ADJUSTMENTS if isBlack else pieceClass._WHITE_ADJUSTMENTS
+    return tuple(base + adjustment for adjustment in adjustments)
 
 
 class AbstractPiece(Observable):
@@ -10,12 +26,32 @@ class AbstractPiece(Observable):
 
     # REFACTOR - currently these pieces 'assume' they're on an 8x8 board.
 
+    # kinds of piece. Each class sets KIND so the kind can be checked with an int comparison rather than isinstance
+    PAWN = 0
+    KNIGHT = 1
+    BISHOP = 2
+    ROOK = 3
+    QUEEN = 4
+    KING = 5
+    KIND = None
+    # value of a white piece of the kind. Black pieces score the negative of this
+    BASE_SCORE = 0
+    # the character used to display the piece - (white, black)
+    _CHARACTERS = ('', '')
+
+    # piece square tables - score adjustments indexed by the piece's flat grid index (r * 8 + c). Class level so every
+    # piece of a kind shares the same table rather than building its own
+    _BLACK_ADJUSTMENTS = (0,) * 64
+    _WHITE_ADJUSTMENTS = (0,) * 64
+
     def __init__(self, isblack, position):
         super().__init__()
         self._isBlack = isblack
         self._currentPosition = position
-        self._adjustmentGrid = [[None for c in range(8)]for r in range(8)]
-        self.__gridReference = self.__positionToGridRerence()
+        # index of the square in the board's flat grid and bitboards
+        self._index = self.__positionToIndex()
+        self._base = -self.BASE_SCORE if isblack else self.BASE_SCORE
+        self._scores = _scoreTable(type(self), bool(isblack))
 
     def __str__(self):
         return self._piecechr()
@@ -23,18 +59,51 @@ class AbstractPiece(Observable):
     def __repr__(self):
         return f'{self.colour()} {self.description()} at {self._currentPosition}'
 
+    def __copy__(self):
+        # copies are used on copies of the board. They must not share observers or moving them on a copied board
+        # would notify observers of the real piece
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        Observable.__init__(new)
+        return new
+
     def position(self):
         return self._currentPosition
 
     def setPosition(self, position):
         hasMoved = position != self._currentPosition
         self._currentPosition = position
-        self.__gridReference = self.__positionToGridRerence()
-        if hasMoved:
+        self._index = self.__positionToIndex()
+        # nothing watches the pieces moved about by a search so don't make the call unless someone is listening
+        if hasMoved and self._observers:
             self.notify(self)
 
-    @abstractmethod
     def availableSquares(self, board):
+        """
+        :param board: the board the piece is on
+        :return: list of labels (eg d5) of the squares the piece can move to
+        """
+        labels = board.labels()
+        return [labels[i] for i in self.availableIndexes(board)]
+
+    def availableIndexes(self, board):
+        """
+        Squares the piece can move to as indexes in to the board's flat grid (r * size + c). Worked out from the board's
+        ray tables and bitboards so no labels are parsed.
+        :param board: the board the piece is on
+        :return: list of int
+        """
+        return self.availableIndexesFrom(board, self._index)
+
+    @abstractmethod
+    def availableIndexesFrom(self, board, index):
+        """
+        As availableIndexes but for the piece on the square at index. A search moves pieces about with board.make
+        which doesn't update the piece's own position so it passes in the square the piece is on.
+        :param board: the board the piece is on
+        :param index: index of the piece's square in the board's flat grid
+        :return: list of int
+        """
         pass
 
     def score(self):
@@ -45,19 +114,24 @@ class AbstractPiece(Observable):
         Black should score negative and white positive. This allows black to try and maximise negative and white positive
         :return: signed int
         """
-        return self._baseScore() + self._scoreAdjustment()
+        return self._scores[self._index]
+
+    def scoreAt(self, index):
+        """
+        :param index: index of a square in the board's flat grid
+        :return: signed int - the score the piece would have on that square
+        """
+        return self._scores[index]
 
-    @abstractmethod
     def _baseScore(self):
-        pass
+        return self._base
 
     @abstractmethod
     def description(self):
         pass
 
-    @abstractmethod
     def _piecechr(self):
-        pass
+        return self._CHARACTERS[self._isBlack]
 
     def display(self): return self._piecechr()
     def isBlack(self): return self._isBlack
@@ -65,10 +139,15 @@ class AbstractPiece(Observable):
     def colour(self): return 'Black' if self._isBlack else 'White'
 
     def _scoreAdjustment(self):
-        if self._adjustmentGrid:
-            return self._adjustmentGrid[self.__gridReference[0]][self.__gridReference[1]]
-        else:
-            return 0
+        return self._scores[self._index] - self._base
+
+    def __positionToIndex(self):
+        try:
+            return _POSITION_TO_INDEX[self._currentPosition]
+        except KeyError:
+            # not a square on the board - the parser reports what is wrong with it
+            row, col = self.__positionToGridRerence()
+            return row * 8 + col
 
     def __positionToGridRerence(self):
         if len(self._currentPosition) != 2:
@@ -77,88 +156,108 @@ class AbstractPiece(Observable):
         else:
             col = self._currentPosition[0].lower()
             try:
-                row = len(self._adjustmentGrid) - int(self._currentPosition[1])
+                row = 8 - int(self._currentPosition[1])
             except:
-                raise ValueError(f'Invalid row. Valid rows are integers in the range: 1..{len(self._adjustmentGrid)}')
-            if row not in range(len(self._adjustmentGrid)):
-                raise ValueError(f'Invalid row. Valid rows are in the range: 1..{len(self._adjustmentGrid)}')
+                raise ValueError('Invalid row. Valid rows are integers in the range: 1..8')
+            if row not in range(8):
+                raise ValueError('Invalid row. Valid rows are in the range: 1..8')
             colOrd = ord(col)
             return row, (ord(col) - ord('a'))
 
 class Pawn(AbstractPiece):
-
-    def __init__(self,isBlack, position):
-        super().__init__(isBlack, position)
+    KIND = AbstractPiece.PAWN
+    BASE_SCORE = 10
+    _CHARACTERS = (chr(9817), chr(9823))
+
+    _BLACK_ADJUSTMENTS = (
+        -0, -0, -0, -0, -0, -0, -0, -0,
+        -0, -0, -0, -0, -0, -0, -0, -0,
+        -0, -0, -0, -1, -1, -0, -0, -0,
+        -0, -0, -0, -2, -2, -0, -0, -0,
+        -0, -0, -0, -0, -0, -0, -0, -0,
+        -10, -10, -10, -30, -30, -30, -30, -30,
+        -30, -30, -30, -30, -30, -30, -30, -30,
+        -80, -80, -80, -80, -80, -80, -80, -80,
+    )
+    _WHITE_ADJUSTMENTS = (
+        80, 80, 80, 80, 80, 80, 80, 80,
+        30, 30, 30, 30, 30, 30, 30, 30,
+        10, 10, 10, 10, 10, 10, 10, 10,
+        0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 2, 2, 0, 0, 0,
+        0, 0, 0, 1, 1, 0, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    )
+
+
+    # bitboard masks for the 8x8 board. Row 0 (bits 0-7) is rank 8
+    _BOARD = (1 << 64) - 1
+    _WHITE_START_ROW = 0xFF << 48
+    _BLACK_START_ROW = 0xFF << 8
+    _NOT_FILE_A = _BOARD ^ sum(1 << (r * 8) for r in range(8))
+    _NOT_FILE_H = _BOARD ^ sum(1 << (r * 8 + 7) for r in range(8))
+    # change of index for each of the moves in the order given by movesBitboards
+    _WHITE_OFFSETS = (-8, -16, -7, -9)
+    _BLACK_OFFSETS = (8, 16, 9, 7)
+
+    @classmethod
+    def movesBitboards(cls, pawns, occupied, enemy, isBlack):
+        """
+        Works out which pawns can make each kind of pawn move by shifting bitboards, so all of a side's pawns are
+        done at once rather than looking at the squares around each pawn in turn.
+        :param pawns: bitboard of the pawns (all of one colour)
+        :param occupied: bitboard of every piece on the board
+        :param enemy: bitboard of the other side's pieces
+        :param isBlack: colour of the pawns
+        :return: tuple of bitboards (forward, double, diagonal1, diagonal2) - the pawns that can move one square
+        forward, two squares forward and take along each diagonal
+        """
+        empty = ~occupied & cls._BOARD
         if isBlack:
-            self._adjustmentGrid = [
-                [-0, -0, -0, -0, -0, -0, -0, -0],
-                [-0, -0, -0, -0, -0, -0, -0, -0],
-                [-0, -0, -0, -1, -1, -0, -0, -0],
-                [-0, -0, -0, -2, -2, -0, -0, -0],
-                [-0, -0, -0, -0, -0, -0, -0, -0],
-                [-10, -10, -10, -30, -30, -30, -30, -30],
-                [-30, -30, -30, -30, -30, -30, -30, -30],
-                [-80, -80, -80, -80, -80, -80, -80, -80]
-            ]
-        else:
-            self._adjustmentGrid = [
-                [80, 80, 80, 80, 80, 80, 80, 80],
-                [30, 30, 30, 30, 30, 30, 30, 30],
-                [10, 10, 10, 10, 10, 10, 10, 10],
-                [0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 2, 2, 0, 0, 0],
-                [0, 0, 0, 1, 1, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 0, 0, 0, 0, 0]
-            ]
-
+            # black moves down the board - to higher bits
+            ahead = empty >> 8
+            return (pawns & ahead,
+                    pawns & cls._BLACK_START_ROW & ahead & (empty >> 16),
+                    pawns & cls._NOT_FILE_H & (enemy >> 9),
+                    pawns & cls._NOT_FILE_A & (enemy >> 7))
+        ahead = (empty << 8) & cls._BOARD
+        return (pawns & ahead,
+                pawns & cls._WHITE_START_ROW & ahead & (empty << 16),
+                pawns & cls._NOT_FILE_H & (enemy << 7),
+                pawns & cls._NOT_FILE_A & (enemy << 9))
+
+    @classmethod
+    def indexesFrom(cls, index, isBlack, movesBitboards):
+        """
+        :param index: index of the pawn's square in the board's flat grid
+        :param movesBitboards: result of movesBitboards for bitboards including the pawn
+        :return: list of int - indexes of the squares the pawn can move to
+        """
+        bit = 1 << index
+        offsets = cls._BLACK_OFFSETS if isBlack else cls._WHITE_OFFSETS
+        return [index + offset for offset, canMove in zip(offsets, movesBitboards) if canMove & bit]
 
-    def availableSquares(self, board):
+    def availableIndexesFrom(self, board, index):
         """
         Pawns can move forward one square typically if not blocked by any piece. Two on first move
         Pawns can move diagonally one space if that takes another piece
         :param board:
-        :param fromSquare: square piece is currently on
-        :return: Array of strings representing squares
+        :param index: index of the pawn's square
+        :return: list of int - indexes of the squares
         """
-        moves = []
-        # note (r,c) referencing here is zero based top to bottom So A1 is actually (7,0) and H8 is (7,0)
-        direction = (1,0) if self.isBlack() else (-1,0)
-        canMoveTwo = (self.isBlack() and self._currentPosition[1] == '7') or ((not self.isBlack()) and self._currentPosition[1] == '2')
-
-        s = board._positionXandYFrom(self._currentPosition, direction)
-        if s and board.isEmpty(s):
-            moves.append(s)
-            # check for double move
-            if canMoveTwo:
-                # hasn't moved so perhaps can move 2 spaces
-                s = board._positionXandYFrom(s, direction)
-                if s and board.isEmpty(s):
-                    moves.append(s)
-
-        # check diagonals
-        for m in [(1,1),(1,-1)] if self.isBlack() else [(-1,1),(-1,-1)]:
-            s = board._positionXandYFrom(self._currentPosition, m)
-            pieceAtTarget = board.pieceAtLabel(s)
-            if pieceAtTarget and pieceAtTarget.isBlack() != self.isBlack():
-                moves.append(s)
-
-        return moves
+        isBlack = self._isBlack
+        moves = self.movesBitboards(1 << index, board.occupiedBitboard(), board.colourBitboard(not isBlack), isBlack)
+        return self.indexesFrom(index, isBlack, moves)
 
     def attackingSquares(self, board):
-        moves = []
-        # check diagonals
-        for m in [(1,1),(1,-1)] if self.isBlack() else [(-1,1),(-1,-1)]:
-            s = board._positionXandYFrom(self._currentPosition, m)
-            if s: moves.append(s)
-        return moves
+        labels = board.labels()
+        rays = board.raysFrom(self._index, ((1,1),(1,-1)) if self._isBlack else ((-1,1),(-1,-1)))
+        return [labels[ray[0]] for ray in rays if ray]
 
 
     def description(self): return "Pawn"
 
-    def _baseScore(self):
-        return -10 if self.isBlack() else 10
-
     # def score(self, board):
     #     if self.isBlack():
     #         # next move and its a queen
@@ -172,14 +271,13 @@ class Pawn(AbstractPiece):
     #         elif self._currentPosition[1] == '8': return 9 # this will be promoted to a queen
     #         else: return 1
 
-    def _piecechr(self):
-        return chr(9823) if self.isBlack() else chr(9817)
-
 class AbstractOfficer(AbstractPiece):
-    @abstractmethod
+    # the (r,c) directions the piece moves in. Set by each officer - see _validDirections
+    _DIRECTIONS = ()
+
     def _validDirections(self):
         """
-        This should return a list (iterable) of tuples giving (r,c) where r and c represent rows and columns that
+        This returns a list (iterable) of tuples giving (r,c) where r and c represent rows and columns that
         a piece can move. Note this is only giving the direction - so it's hte minimum move. See method _canMoveMultipleTimes
         for pieces moving more than one square. Here are examples of moves for each piece:
         Bishop - (1,1) - it can move a diagonal up one row and across one column. NB this is just one of it's possible moves
@@ -188,9 +286,10 @@ class AbstractOfficer(AbstractPiece):
         Queen - (1,0) - up 1
         King - (1,0) - up one
         Note this is only for 'officers' ie not pawns.
+        The directions are held as a class constant (_DIRECTIONS) so the same tuple is handed out every time
         :return: iterable
         """
-        pass
+        return self._DIRECTIONS
 
     @abstractmethod
     def _canMoveMultipleTimes(self):
@@ -204,56 +303,53 @@ class AbstractOfficer(AbstractPiece):
     def description(self):
         pass
 
-    def availableSquares(self, board):
+    def availableIndexesFrom(self, board, index):
+        own = board.colourBitboard(self._isBlack)
+        if not self._canMoveMultipleTimes():
+            # knight and king - any square a step away that isn't taken by one of our own pieces
+            return [possMove for possMove in board.stepsFrom(index, self._validDirections()) if not own >> possMove & 1]
         moves = []
-        for d in self._validDirections():
-            possMove = self._currentPosition
-            while True:
-                possMove = board.positionOffset(possMove, d)
-                if possMove and board.isEmpty(possMove):
-                    moves.append(possMove)
-                elif possMove and board.isBlack(possMove) != self.isBlack():
-                    # can move to this point, take the piece but move no further
-                    moves.append(possMove)
+        enemy = board.colourBitboard(not self._isBlack)
+        for ray in board.raysFrom(index, self._validDirections()):
+            # squares in one of the piece's directions from here, nearest first
+            for possMove in ray:
+                bit = 1 << possMove
+                if own & bit:
                     break
-                else:
-                    break
-                if not self._canMoveMultipleTimes():
-                    # only allow one move
+                moves.append(possMove)
+                if enemy & bit:
+                    # can move to this point, take the piece but move no further
                     break
         return moves
 
 
 class Knight(AbstractOfficer):
-
-    def __init__(self,isBlack, position):
-        super().__init__(isBlack, position)
-        if isBlack:
-            self._adjustmentGrid = [
-                [5, 4, 3, 3, 3, 3, 4, 5],
-                [4, 2, 0, 0, 0, 0, 2, 4],
-                [3, 0, -1, -2, -2, -1, 0, 3],
-                [3, -1, -2, -3, -3, -2, -1, 3],
-                [3, -1, -2, -3, -3, -2, -1, 3],
-                [3, 0, -1, -2, -2, -1, 0, 3],
-                [4, 2, 0, 0, 0, 0, 2, 4],
-                [5, 4, 3, 3, 3, 3, 4, 5]
-            ]
-        else:
-            self._adjustmentGrid = [
-                [-5, -4, -3, -3, -3, -3, -4, -5],
-                [-4, -2, 0, 0, 0, 0, -2, -4],
-                [-3, 0, 1, 2, 2, 1, 0, -3],
-                [-3, 1, 2, 3, 3, 2, 1, -3],
-                [-3, 1, 2, 3, 3, 2, 1, -3],
-                [-3, 0, 1, 2, 2, 1, 0, -3],
-                [-4, -2, 0, 0, 0, 0, -2, -4],
-                [-5, -4, -3, -3, -3, -3, -4, -5]
-            ]
-
-
-    def _validDirections(self):
-        return ((2,-1), (2,1), (1,-2), (1,2), (-1,-2), (-1,2), (-2,-1), (-2,1))
+    KIND = AbstractPiece.KNIGHT
+    BASE_SCORE = 30
+    _CHARACTERS = (chr(9816), chr(9822))
+
+    _BLACK_ADJUSTMENTS = (
+        5, 4, 3, 3, 3, 3, 4, 5,
+        4, 2, 0, 0, 0, 0, 2, 4,
+        3, 0, -1, -2, -2, -1, 0, 3,
+        3, -1, -2, -3, -3, -2, -1, 3,
+        3, -1, -2, -3, -3, -2, -1, 3,
+        3, 0, -1, -2, -2, -1, 0, 3,
+        4, 2, 0, 0, 0, 0, 2, 4,
+        5, 4, 3, 3, 3, 3, 4, 5,
+    )
+    _WHITE_ADJUSTMENTS = (
+        -5, -4, -3, -3, -3, -3, -4, -5,
+        -4, -2, 0, 0, 0, 0, -2, -4,
+        -3, 0, 1, 2, 2, 1, 0, -3,
+        -3, 1, 2, 3, 3, 2, 1, -3,
+        -3, 1, 2, 3, 3, 2, 1, -3,
+        -3, 0, 1, 2, 2, 1, 0, -3,
+        -4, -2, 0, 0, 0, 0, -2, -4,
+        -5, -4, -3, -3, -3, -3, -4, -5,
+    )
+
+    _DIRECTIONS = ((2,-1), (2,1), (1,-2), (1,2), (-1,-2), (-1,2), (-2,-1), (-2,1))
 
     def _canMoveMultipleTimes(self):
         return False
@@ -271,171 +367,137 @@ class Knight(AbstractOfficer):
     #         score -= 1
     #     return score * factor
 
-    def _baseScore(self):
-        return -30 if self.isBlack() else 30
-
-    def _piecechr(self):
-        return chr(9822) if self.isBlack() else chr(9816)
-
 class Bishop(AbstractOfficer):
-
-    def __init__(self,isBlack, position):
-        super().__init__(isBlack, position)
-        if isBlack:
-            self._adjustmentGrid = [
-                [2,1,1,1,1,1,1,2],
-                [1,0,0,0,0,0,0,1],
-                [1,0,-1,-1,-1,-1,0,1],
-                [1,0,-1,-1,-1,-1,0,1],
-                [1,0,-1,-1,-1,-1,0,1],
-                [1,0,-1,-1,-1,-1,0,1],
-                [1,0,0,0,0,0,0,1],
-                [2,1,1,1,1,1,1,2]
-            ]
-        else:
-            self._adjustmentGrid = [
-                [-2,-1,-1,-1,-1,-1,-1,-2],
-                [-1,0,0,0,0,0,0,-1],
-                [-1,0,1,1,1,1,0,-1],
-                [-1,0,1,1,1,1,0,-1],
-                [-1,0,1,1,1,1,0,-1],
-                [-1,0,1,1,1,1,0,-1],
-                [-1,0,0,0,0,0,0,-1],
-                [-2,-1,-1,-1,-1,-1,-1,-2]
-            ]
-
-    def _validDirections(self):
-        return ((1, 1), (1, -1), (-1, 1), (-1, -1))
+    KIND = AbstractPiece.BISHOP
+    BASE_SCORE = 30
+    _CHARACTERS = (chr(9815), chr(9821))
+
+    _BLACK_ADJUSTMENTS = (
+        2,1,1,1,1,1,1,2,
+        1,0,0,0,0,0,0,1,
+        1,0,-1,-1,-1,-1,0,1,
+        1,0,-1,-1,-1,-1,0,1,
+        1,0,-1,-1,-1,-1,0,1,
+        1,0,-1,-1,-1,-1,0,1,
+        1,0,0,0,0,0,0,1,
+        2,1,1,1,1,1,1,2,
+    )
+    _WHITE_ADJUSTMENTS = (
+        -2,-1,-1,-1,-1,-1,-1,-2,
+        -1,0,0,0,0,0,0,-1,
+        -1,0,1,1,1,1,0,-1,
+        -1,0,1,1,1,1,0,-1,
+        -1,0,1,1,1,1,0,-1,
+        -1,0,1,1,1,1,0,-1,
+        -1,0,0,0,0,0,0,-1,
+        -2,-1,-1,-1,-1,-1,-1,-2,
+    )
+
+    _DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
 
     def _canMoveMultipleTimes(self):
         return True
 
     def description(self): return 'Bishop'
 
-    def _baseScore(self):
-        return -30 if self.isBlack() else 30
-
-    def _piecechr(self):
-        return chr(9821) if self.isBlack() else chr(9815)
-
 class Rook(AbstractOfficer):
-
-    def __init__(self,isBlack, position):
-        super().__init__(isBlack, position)
-        if isBlack:
-            self._adjustmentGrid = [
-                [-0, -0, -0, -1, -1, -1, -0, -0],
-                [-0, -0, -0, -0, -0, -0, -0, -0],
-                [1, -0, -0, -0, -0, -0, -0, 1],
-                [1, -0, -0, -0, -0, -0, -0, 1],
-                [1, -0, -0, -0, -0, -0, -0, 1],
-                [1, -0, -0, -0, -0, -0, -0, 1],
-                [-0, -1, -1, -1, -1, -1, -1, -0],
-                [-0, -0, -0, -0, -0, -0, -0, -0]
-            ]
-        else:
-            self._adjustmentGrid = [
-                [0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 1, 1, 1, 1, 1, 1, 0],
-                [-1, 0, 0, 0, 0, 0, 0, -1],
-                [-1, 0, 0, 0, 0, 0, 0, -1],
-                [-1, 0, 0, 0, 0, 0, 0, -1],
-                [-1, 0, 0, 0, 0, 0, 0, -1],
-                [0, 0, 0, 0, 0, 0, 0, 0],
-                [0, 0, 0, 1, 1, 1, 0, 0]
-            ]
-
-    def _validDirections(self):
-        return ((1,0),(0,1),(-1,0),(0,-1))
+    KIND = AbstractPiece.ROOK
+    BASE_SCORE = 50
+    _CHARACTERS = (chr(9814), chr(9820))
+
+    _BLACK_ADJUSTMENTS = (
+        -0, -0, -0, -1, -1, -1, -0, -0,
+        -0, -0, -0, -0, -0, -0, -0, -0,
+        1, -0, -0, -0, -0, -0, -0, 1,
+        1, -0, -0, -0, -0, -0, -0, 1,
+        1, -0, -0, -0, -0, -0, -0, 1,
+        1, -0, -0, -0, -0, -0, -0, 1,
+        -0, -1, -1, -1, -1, -1, -1, -0,
+        -0, -0, -0, -0, -0, -0, -0, -0,
+    )
+    _WHITE_ADJUSTMENTS = (
+        0, 0, 0, 0, 0, 0, 0, 0,
+        0, 1, 1, 1, 1, 1, 1, 0,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 1, 1, 1, 0, 0,
+    )
+
+    _DIRECTIONS = ((1,0),(0,1),(-1,0),(0,-1))
 
     def _canMoveMultipleTimes(self):
         return True
 
     def description(self): return "Rook"
 
-    def _baseScore(self):
-        return -50 if self.isBlack() else 50
-
-    def _piecechr(self):
-        return chr(9820) if self.isBlack() else chr(9814)
-
-class Queen(Rook, Bishop):
+class Queen(AbstractOfficer):
+    KIND = AbstractPiece.QUEEN
+    BASE_SCORE = 90
+    _CHARACTERS = (chr(9813), chr(9819))
+
+    # centre of board better than outside. Don't want too big adjustment as that may encourage early
+    # exposure of the queen
+    _BLACK_ADJUSTMENTS = (
+        2, 1, 1, 0, 0, 1, 1, 2,
+        1, 0, 0, 0, 0, 0, 0, 1,
+        1, 0, -1, -1, -1, -1, 0, 1,
+        0, 0, -1, -1, -1, -1, 0, 0,
+        0, 0, -1, -1, -1, -1, 0, 0,
+        1, 0, -1, -1, -1, -1, 0, 1,
+        1, 0, 0, 0, 0, 0, 0, 1,
+        2, 1, 1, 0, 0, 1, 1, 2,
+    )
+    _WHITE_ADJUSTMENTS = (
+        -2, -1, -1, 0, 0, -1, -1, -2,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        0, 0, 1, 1, 1, 1, 0, 0,
+        0, 0, 1, 1, 1, 1, 0, 0,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -2, -1, -1, 0, 0, -1, -1, -2,
+    )
+
+    _DIRECTIONS = Rook._DIRECTIONS + Bishop._DIRECTIONS
 
-    def __init__(self,isBlack, position):
-        AbstractOfficer.__init__(self, isBlack, position)
-        if isBlack:
-            # centre of board better than outside. Don't want too big adjustment as that may encourage early
-            # exposure of the queen
-            self._adjustmentGrid = [
-                [2, 1, 1, 0, 0, 1, 1, 2],
-                [1, 0, 0, 0, 0, 0, 0, 1],
-                [1, 0, -1, -1, -1, -1, 0, 1],
-                [0, 0, -1, -1, -1, -1, 0, 0],
-                [0, 0, -1, -1, -1, -1, 0, 0],
-                [1, 0, -1, -1, -1, -1, 0, 1],
-                [1, 0, 0, 0, 0, 0, 0, 1],
-                [2, 1, 1, 0, 0, 1, 1, 2],
-            ]
-        else:
-            self._adjustmentGrid = [
-                [-2, -1, -1, 0, 0, -1, -1, -2],
-                [-1, 0, 0, 0, 0, 0, 0, -1],
-                [-1, 0, 1, 1, 1, 1, 0, -1],
-                [0, 0, 1, 1, 1, 1, 0, 0],
-                [0, 0, 1, 1, 1, 1, 0, 0],
-                [-1, 0, 1, 1, 1, 1, 0, -1],
-                [-1, 0, 0, 0, 0, 0, 0, -1],
-                [-2, -1, -1, 0, 0, -1, -1, -2]
-            ]
-
-    def _validDirections(self):
-        return Rook._validDirections(self) + Bishop._validDirections(self)
+    def _canMoveMultipleTimes(self):
+        return True
 
     def description(self): return 'Queen'
 
-    def _baseScore(self):
-        return -90 if self.isBlack() else 90
-
-    def _piecechr(self):
-        return chr(9819) if self.isBlack() else chr(9813)
-
 class King(Queen):
-
-    def __init__(self,isBlack, position):
-        super().__init__(isBlack, position)
-        if isBlack:
-            # adjustments - scores better if sitting in its own cornders - baddly in middle of board and in opponents half
-            self._adjustmentGrid = [
-                [-3, -2, -1, -0, -0, -1, -2, -3],
-                [-2, -2, -0, -0, -0, -0, -2, -2],
-                [1, 2, 2, 2, 2, 2, 2, 1],
-                [2, 3, 3, 4, 4, 3, 3, 2],
-                [3, 4, 5, 5, 5, 5, 4, 3],
-                [3, 4, 5, 5, 5, 5, 4, 3],
-                [3, 4, 5, 5, 5, 5, 4, 3],
-                [3, 4, 5, 5, 5, 5, 4, 3]
-            ]
-        else:
-            self._adjustmentGrid = [
-                [-3, -4, -5, -5, -5, -5, -4, -3],
-                [-3, -4, -5, -5, -5, -5, -4, -3],
-                [-3, -4, -5, -5, -5, -5, -4, -3],
-                [-3, -4, -5, -5, -5, -5, -4, -3],
-                [-2, -3, -3, -4, -4, -3, -3, -1],
-                [-1, -2, -2, -2, -2, -2, -2, -1],
-                [2, 2, 0, 0, 0, 0, 2, 2],
-                [3, 2, 1, 0, 0, 1, 2, 3]
-            ]
+    KIND = AbstractPiece.KING
+    # If you lose your King you've lost the game. King is effectively infinite in value - instead we use a large number
+    BASE_SCORE = 999
+    _CHARACTERS = (chr(9812), chr(9818))
+
+    # adjustments - scores better if sitting in its own cornders - baddly in middle of board and in opponents half
+    _BLACK_ADJUSTMENTS = (
+        -3, -2, -1, -0, -0, -1, -2, -3,
+        -2, -2, -0, -0, -0, -0, -2, -2,
+        1, 2, 2, 2, 2, 2, 2, 1,
+        2, 3, 3, 4, 4, 3, 3, 2,
+        3, 4, 5, 5, 5, 5, 4, 3,
+        3, 4, 5, 5, 5, 5, 4, 3,
+        3, 4, 5, 5, 5, 5, 4, 3,
+        3, 4, 5, 5, 5, 5, 4, 3,
+    )
+    _WHITE_ADJUSTMENTS = (
+        -3, -4, -5, -5, -5, -5, -4, -3,
+        -3, -4, -5, -5, -5, -5, -4, -3,
+        -3, -4, -5, -5, -5, -5, -4, -3,
+        -3, -4, -5, -5, -5, -5, -4, -3,
+        -2, -3, -3, -4, -4, -3, -3, -1,
+        -1, -2, -2, -2, -2, -2, -2, -1,
+        2, 2, 0, 0, 0, 0, 2, 2,
+        3, 2, 1, 0, 0, 1, 2, 3,
+    )
 
     def _canMoveMultipleTimes(self):
         return False
 
     def description(self): return 'King'
 
-    def _baseScore(self):
-        # If you lose your King you've lost the game. King is effectively infinite in value - instead we use a large number
-        return -999 if self.isBlack() else 999
-
-    def _piecechr(self):
-        return chr(9818) if self.isBlack() else chr(9812)
-
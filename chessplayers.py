@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-import re
-from random import randint
+from random import Random
+import time
 from chessgame import PawnPromotion, ChessConstants, BasicChessMoveCalculator
+from chesspieces import Pawn, King
 import logging
 
 class ChessPlayers:
@@ -17,6 +18,8 @@ class ChessPlayers:
 
 
 class AbstractPlayer(ABC):
+    # slots make attribute access quicker in the searches. Each subclass lists the attributes it adds
+    __slots__ = ('_game', 'isBlack', 'name')
     def __init__(self, isBlack, name):
         self._game = None
         self.isBlack = isBlack
@@ -55,16 +58,18 @@ class ComputerLevelZeroPlayer(AbstractPlayer):
     """
     This computer player chooses randomly from available moves.
     """
+    __slots__ = ('_promotePawnChoice', '_random')
 
     def __init__(self, isBlack, name='Toe Deep Blue'):
         super().__init__(isBlack, name)
         self._promotePawnChoice = None
+        # each player has its own random number generator rather than sharing the module's
+        self._random = Random()
 
     def choseMove(self, board, moves, observable=None, incheck=False):
         availableMoves = [m for m in moves if not m.disallowed]
         if len(availableMoves)>0:
-            choice = randint(0, len(availableMoves)-1)
-            return availableMoves[choice]
+            return self._random.choice(availableMoves)
 
     def setPromotePawnChoice(self, promote, square):
         self._promotePawnChoice = PawnPromotion(square, self.isBlack, 'Q')
@@ -78,6 +83,7 @@ class ComputerLevelOnePlayer(ComputerLevelZeroPlayer):
     In practise it means it at least takes a piece if it's offered but is easy to beat as it doesn't consider
     whether it may lose a piece in exchange.
     """
+    __slots__ = ('_calculator',)
 
     def __init__(self, isBlack, name='Shallow Blue'):
         super().__init__( isBlack, name)
@@ -91,28 +97,28 @@ class ComputerLevelOnePlayer(ComputerLevelZeroPlayer):
         if moves:
             availableMoves = moves
         else:
-            availableMoves = [m for m in self._calculator.possibleMoves(forBoard,isBlack) if not m.disallowed]
+            # moves straight from the calculator are never marked disallowed so need no filtering
+            availableMoves = self._calculator.possibleMoves(forBoard,isBlack)
 
-        copyBoard = forBoard.copyOfBoard()
-        # randomly chose starting initial move. This ensures that if all moves are same value it choses random
-        move = availableMoves[randint(0, len(availableMoves)-1)]
         # note that if white a high score is better. If black a lower score is better
         scoreFactor = -1 if isBlack else 1
-        copyBoard.move(move.fromSquare, move.toSquare)
-        score = copyBoard.piecesScore()
-
-        logging.debug(f'\tSTART [{"Black" if isBlack else "White"}] move: {move} score: {score}')
-
-        for i in range(1,len(availableMoves)):
-            copyBoard = forBoard.copyOfBoard()
-            copyBoard.move(availableMoves[i].fromSquare, availableMoves[i].toSquare)
-            newScore = copyBoard.piecesScore()
-            logging.debug(f'\t\tCONSIDERING move: {availableMoves[i]} score: {newScore}')
-
-            if newScore*scoreFactor > score*scoreFactor:
+        # a move only changes the score of the squares it is from and to, so the board works out the change without
+        # the move being made. Looked up once as this is called for every reply when looking two moves ahead
+        scoreChange = forBoard.scoreChange
+        currentScore = forBoard.piecesScore()
+        move = None
+        score = None
+
+        # moves are tried in a random order and the first best kept. This ensures that if all moves are same value it choses random
+        for m in self._random.sample(availableMoves, len(availableMoves)):
+            newScore = currentScore + scoreChange(m.fromSquare, m.toSquare)
+            logging.debug(f'\t\tCONSIDERING move: {m} score: {newScore}')
+
+            if move is None or newScore*scoreFactor > bestFactored:
                 logging.debug(f'\tBetter - new best score is {newScore}')
                 score = newScore
-                move = availableMoves[i]
+                bestFactored = score * scoreFactor
+                move = m
 
         return (move, score)
 
@@ -122,6 +128,7 @@ class ComputerLevelTwoPlayer(ComputerLevelOnePlayer):
     This means it won't offer up a stupid sacrifice. Still easily beatable but should give a half decent game and won't
     make many blatant 'mistakes'
     """
+    __slots__ = ()
     def __init__(self, isBlack, name='Out of your depth Blue'):
         super().__init__( isBlack, name)
 
@@ -130,28 +137,24 @@ class ComputerLevelTwoPlayer(ComputerLevelOnePlayer):
         if len(availableMoves) == 0:
             return # game over as no moves
         scoreFactor = -1 if self.isBlack else 1
-        move = availableMoves[randint(0, len(availableMoves)-1)]
-        copyBoard = board.copyOfBoard()
-        copyBoard.move(move.fromSquare, move.toSquare)
-        logging.debug(f'START [{"Black" if self.isBlack else "White"}] move: {move}')
-        score = self._bestScoreAndMoveAfterAMove(copyBoard, not self.isBlack)[1] # this is scoring the opponents move
-        # the best score is now the lowest score after the oponents move - as they're chosing the best for them
-        logging.debug(f'SCORE: {score}')
-
-        for i in range(1, len(availableMoves)):
-            copyBoard = board.copyOfBoard()
-            copyBoard.move(availableMoves[i].fromSquare, availableMoves[i].toSquare)
-            logging.debug(f'\tCONSIDERING move: {availableMoves[i]}')
-
-            newScore = self._bestScoreAndMoveAfterAMove(copyBoard, not self.isBlack)
+        move = None
+        score = None
+
+        # random order so that if several moves are as good one of them is chosen at random
+        for m in self._random.sample(availableMoves, len(availableMoves)):
+            undo = board.make(m.fromSquare, m.toSquare)
+            logging.debug(f'\tCONSIDERING move: {m}')
+
+            newScore = self._bestScoreAndMoveAfterAMove(board, not self.isBlack) # this is scoring the opponents move
+            board.unmake(undo)
             # the best score is now the lowest score after the oponents move - as they're chosing the best for them
             logging.debug(f'\tSCORE: {newScore[1]}')
 
-            if newScore[1] * scoreFactor > score * scoreFactor:
+            if move is None or newScore[1] * scoreFactor > score * scoreFactor:
                 logging.debug(f'Better - new best score is {newScore[1]}')
 
                 score = newScore[1]
-                move = availableMoves[i]
+                move = m
 
         return move
 
@@ -160,6 +163,7 @@ class ComputerTreeSearchPlayer(ComputerLevelTwoPlayer):
     This looks an arbitrary number of moves ahead. The tree grows rapidly (exponentially) ... so looking more than
     a few levels down will get very slow.
     """
+    __slots__ = ('_depth', 'leafCount', 'moveCount')
     def __init__(self, isBlack, depth, name='Deepish Blue'):
         newName = f'{name} (level {str(depth)}'
         super().__init__( isBlack, newName)
@@ -171,174 +175,327 @@ class ComputerTreeSearchPlayer(ComputerLevelTwoPlayer):
     def choseMove(self, board, moves, observable=None, incheck=False):
         self.leafCount = 0
         self.moveCount = 0
-        availableMoves = {m for m in moves if not m.disallowed}
+        availableMoves = [m for m in moves if not m.disallowed]
         if len(availableMoves) == 1:
-            return list(availableMoves)[0]
+            return availableMoves[0]
         else:
-            return self._bestScore(0,board,self.isBlack, moves)[1]
+            return self._bestScore(0,board,self.isBlack, availableMoves)[1]
 
+    # negamax - the score returned is for the player to move. The board scores black as negative so black's scores
+    # are flipped. Each player then picks the move with the highest score
     def _bestScore(self, depth, board, isBlack, moves=None):
         spaces = '  ' * depth
+        colour = 'Black' if isBlack else 'White'
         if depth == self._depth:
             self.leafCount += 1
             # searched as far down as we want to go
-            colour = 'Black' if isBlack else 'White'
             s = board.piecesScore()
-            logging.debug(f'\t\tSeaching tree: {self.leafCount} Score: {s:04d}`r')
-            logging.debug(f'{spaces}Depth: {depth} [{colour}] Searching tree: {self.leafCount}  score: {s}')
-            return (s, None)
+            # progress only every 1024 leaves - building a log message for every leaf slows the search right down
+            if not self.leafCount & 1023:
+                logging.debug(f'{spaces}Depth: {depth} [{colour}] Searching tree: {self.leafCount}  score: {s}')
+            return (-s if isBlack else s, None)
         else:
-            availableMoves = moves if moves else [m for m in self._calculator.possibleMoves(board,isBlack) if not m.disallowed]
-            if isBlack:
-                # so negative is good
-                score = 99999 # big positive number - so guaranteed all scores will be less than
-                move = None
-                for m in availableMoves:
-                    if depth == 0:
-                        self.moveCount += 1
+            availableMoves = moves if moves else self._calculator.possibleMoves(board,isBlack)
+            score = -99999 # big negative number - so guaranteed all scores will be more than
+            move = None
+            for m in availableMoves:
+                if depth == 0:
+                    self.moveCount += 1
                     logging.debug(f'checking {m} Move {self.moveCount} of {len(availableMoves)} moves')
-                    copyBoard = board.copyOfBoard() # CHECK - could do a lot of copies
-                    copyBoard.move(m.fromSquare, m.toSquare)
-                    newScore = self._bestScore(depth+1, copyBoard, not isBlack)[0]
-                    if newScore < score:
-                        score = newScore
-                        move = m
-                        logging.debug(f'{spaces}DEPTH:{depth} [Black] Returning {move} with score {score}')
-                return (score, move)
-            else:
-                # white to positive is good
-                score = -99999
-                move = None
-                for m in availableMoves:
-                    copyBoard = board.copyOfBoard() # CHECK - could do a lot of copies
-                    copyBoard.move(m.fromSquare, m.toSquare)
-                    newScore = self._bestScore(depth+1, copyBoard, not isBlack)[0]
-                    if newScore > score:
-                        score = newScore
-                        move = m
-                logging.debug(f'{spaces}DEPTH:{depth} [White] Returning {move} with score {score}')
-                return (score, move)
+                undo = board.make(m.fromSquare, m.toSquare)
+                newScore = -self._bestScore(depth+1, board, not isBlack)[0]
+                board.unmake(undo)
+                if newScore > score:
+                    score = newScore
+                    move = m
+            logging.debug(f'{spaces}DEPTH:{depth} [{colour}] Returning {move} with score {score}')
+            return (score, move)
 
 
 class ComputerTreeSearchAlphaBetaPlayer(ComputerLevelTwoPlayer):
     """
     This looks an arbitrary number of moves ahead. The tree grows rapidly (exponentially) ... so looking more than
-    a few levels down will get very slow.
+    a few levels down will get very slow. Below that depth only captures are searched (see _quiesce).
+    Positions already searched are kept in a transposition table, keyed by the board's Zobrist hash, so a position
+    reached by a different order of moves isn't searched again.
+    The search is iterative deepening - one move ahead, then two and so on down to the depth. The best moves found by
+    each search are searched first by the next so it prunes more. If given a time limit (seconds) the deepest search
+    that finishes within it is used.
+    Null move pruning - if the player to move could pass and a shallower search still shows their opponent can do no
+    better than beta, the position isn't searched any further.
     """
-
-    def __init__(self, isBlack, depth, debug=False, name='Deeper Blue'):
+    __slots__ = ('_depth', '__debug', '_timeLimit', '_searchDepth', '_deadline', '_transpositionTable', '_killers',
+                 '_history', 'leafCount', 'moveCount')
+    # transposition table flags - whether the stored score is exact or only a bound on the score
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+    # how many fewer moves ahead the search after a null move (a pass) looks
+    NULL_MOVE_REDUCTION = 2
+
+    def __init__(self, isBlack, depth, debug=False, name='Deeper Blue', timeLimit=None):
         newName = f'{name} (level {str(depth)})'
         super().__init__(isBlack, newName)
         self._depth = depth
         self.__debug = debug
+        self._timeLimit = timeLimit
+        # depth of the current iteration of the search and the time.monotonic() it must finish by (None if no limit)
+        self._searchDepth = depth
+        self._deadline = None
+        self._clearSearchTables()
+
+    def _clearSearchTables(self):
+        """
+        What is learnt during a search is only kept for that search. The tables would otherwise keep growing as the
+        game goes on
+        """
+        # (position hash, isBlack) -> (score, move, flag, depth still to search). The move is searched first whatever
+        # depth it was found at, the score is only used at the same depth
+        self._transpositionTable = {}
+        # for ordering moves that aren't captures. Killers - the last two (from, to) that caused a cutoff at each
+        # depth. History - (from, to) -> how much cutting off with the move has saved searching
+        self._killers = [[None, None] for _ in range(self._depth)]
+        self._history = {}
 
     def setDepth(self, depth):
         self._depth = depth
+        self._clearSearchTables()
 
     def setDebug(self, debug):
         self.__debug = debug
 
+    def setTimeLimit(self, timeLimit):
+        """
+        :param timeLimit: seconds to search for. None to always search to the full depth
+        """
+        self._timeLimit = timeLimit
+
     def choseMove(self, board, moves, observable=None, incheck=False):
         self.leafCount = 0
         self.moveCount = 0
-        availableMoves = {m for m in moves if not m.disallowed}
+        self._clearSearchTables()
+        availableMoves = [m for m in moves if not m.disallowed]
         if len(availableMoves) == 1:
-            return list(availableMoves)[0]
-        else:
-            return self._bestScore(0, -9999, 9999, board, self.isBlack, availableMoves)[1]
+            return availableMoves[0]
+        started = time.monotonic()
+        best = None
+        # the first search always finishes so there is a move to make. The time limit applies to the deeper ones
+        self._deadline = None
+        for searchDepth in range(1, self._depth + 1):
+            self._searchDepth = searchDepth
+            self.moveCount = 0
+            try:
+                best = self._bestScore(0, -9999, 9999, board, self.isBlack, availableMoves)[1]
+            except TimeoutError:
+                logging.debug(f'Out of time searching to depth {searchDepth}')
+                break
+            if self._timeLimit is not None:
+                self._deadline = started + self._timeLimit
+        self._deadline = None
+        return best
 
     # incorporating "alpha-beta" pruning - this stops searching branches that can give nothing better than we've already found
-    def _bestScore(self, depth, alpha, beta, board, isBlack, moves=None):
-        spaces = '  ' * depth
-        if depth == self._depth:
+    # the score returned is for the player to move (negamax) - so alpha is the best score they are already guaranteed
+    # and beta the best their opponent is
+    def _bestScore(self, depth, alpha, beta, board, isBlack, moves=None, allowNullMove=True):
+        remainingDepth = self._searchDepth - depth
+        if not remainingDepth:
             self.leafCount += 1
-            # searched as far down as we want to go
-            s = board.piecesScore()
-            if self.__debug:
-                logging.debug(f'{spaces}Depth:{depth} Tree leaf:{self.leafCount}  score:{s}')
-            else:
-                logging.debug(f'Seaching tree: {self.leafCount} depth: {depth} alpha: {alpha} beta: {beta}')
-                logging.debug('\t\tSeaching tree: {self.leafCount}  score: {s}\r')
-            return (s, None)
+            if self._deadline is not None and not self.leafCount & 255 and time.monotonic() > self._deadline:
+                raise TimeoutError(f'Search to depth {self._searchDepth} ran out of time')
+            # searched as far down as we want to go. Only log progress every 1024 leaves - building a log message for
+            # every leaf slows the search right down
+            if self.__debug and not self.leafCount & 1023:
+                logging.debug(f'{"  " * depth}Depth:{depth} Tree leaf:{self.leafCount}  score:{board.piecesScore()}')
+            # the position may be part way through an exchange of pieces so captures are searched on until it's quiet
+            return (self._quiesce(alpha, beta, board, isBlack), None)
         else:
-            availableMoves = moves if moves else [m for m in self._calculator.possibleMoves(board, isBlack) if
-                                                  not m.disallowed]
-            if isBlack:
-                # so negative is good
-                score = 99999  # big positive number - so guaranteed all scores will be less than
-                move = None
-                for m in availableMoves:
-                    if self.__debug:
-                        if depth == 0:
-                            self.moveCount += 1
-                            logging.debug(f'Move {self.moveCount} of {len(availableMoves)} moves: checking {m} ')
-                        logging.debug(f'{spaces} Depth {depth} checking black {m}')
-                    copyBoard = board.copyOfBoard()  # CHECK - could do a lot of copies
-                    copyBoard.move(m.fromSquare, m.toSquare)
-                    newScore = self._bestScore(depth + 1, alpha, beta, copyBoard, False)[0]
-
-                    if newScore < score:
-                        score = newScore
-                        move = m
-
-                    # alpha beta pruning
-                    beta = min(beta, newScore)
+            alphaOrig, betaOrig = alpha, beta
+            ttMove = None
+            key = (board.positionHash(), isBlack)
+            entry = self._transpositionTable.get(key)
+            if entry:
+                score, move, flag, entryDepth = entry
+                ttMove = move
+                # the root is always searched as it is given the moves to choose from
+                if depth and entryDepth == remainingDepth:
+                    if flag == ComputerTreeSearchAlphaBetaPlayer.EXACT:
+                        return (score, move)
+                    elif flag == ComputerTreeSearchAlphaBetaPlayer.LOWER_BOUND:
+                        alpha = max(alpha, score)
+                    else:
+                        beta = min(beta, score)
                     if beta <= alpha:
-                        if depth == 0:
-                            logging.debug(f'{spaces} NOT PRUNED AT DEPTH {depth} after checking {self.moveCount} moves aplha:beta={alpha}:{beta}')
-                        else:
-                            logging.debug(f'{spaces}PRUNED AT DEPTH {depth} aplha:beta={alpha}:{beta}')
-                            break
-                        logging.debug(f'{spaces}PRUNED AT DEPTH {depth} aplha:beta={alpha}:{beta}')
-                        break
-
-                if self.__debug:
-                    logging.debug(f'{spaces}DEPTH:{depth} [Black] Returning {move} with score {score}')
-                return (score, move)
+                        return (score, move)
+            reduction = ComputerTreeSearchAlphaBetaPlayer.NULL_MOVE_REDUCTION
+            if allowNullMove and depth and remainingDepth > reduction and self._canPass(board, isBlack):
+                # pass - the opponent moves again, searched with a window that only shows if they get to beta or not
+                nullScore = -self._bestScore(depth + 1 + reduction, -beta, -beta + 1, board, not isBlack,
+                                             allowNullMove=False)[0]
+                if nullScore >= beta:
+                    return (beta, None)
+            score, move = self._searchMoves(depth, alpha, beta, board, isBlack, moves, ttMove)
+            if score <= alphaOrig:
+                flag = ComputerTreeSearchAlphaBetaPlayer.UPPER_BOUND
+            elif score >= betaOrig:
+                flag = ComputerTreeSearchAlphaBetaPlayer.LOWER_BOUND
             else:
-                # white to positive is good
-                score = -99999
-                move = None
-                for m in availableMoves:
-                    if self.__debug:
-                        if depth == 0:
-                            self.moveCount += 1
-                            logging.debug(f'Move {self.moveCount} of {len(availableMoves)} moves: checking {m} ')
-                        logging.debug(f'{spaces}checking white {m}')
-                    copyBoard = board.copyOfBoard()  # CHECK - could do a lot of copies
-                    copyBoard.move(m.fromSquare, m.toSquare)
-                    newScore = self._bestScore(depth + 1, alpha, beta, copyBoard, True)[0]
-
-                    if newScore > score:
-                        score = newScore
-                        move = m
-
-                    # alpha beta pruning
-                    alpha = max(alpha, newScore)
-                    if beta <= alpha:
-                        if depth == 0:
-                            logging.debug(f'{spaces} NOT PRUNED AT DEPTH {depth} after checking {self.moveCount} moves aplha:beta={alpha}:{beta} ')
-                        else:
-                            logging.debug(f'{spaces}PRUNED AT DEPTH {depth} aplha:beta={alpha}:{beta}')
-                            break
-                            logging.debug(f'{spaces}PRUNED AT DEPTH {depth} aplha:beta={alpha}:{beta}')
-                        break
+                flag = ComputerTreeSearchAlphaBetaPlayer.EXACT
+            self._transpositionTable[key] = (score, move, flag, remainingDepth)
+            return (score, move)
+
+    def _canPass(self, board, isBlack):
+        """
+        Whether to try a null move. Not when in check, as passing would leave the king to be taken. Nor when the player
+        only has a king and pawns - then being made to move can be the worst thing (zugzwang) so passing isn't a
+        safe guess at the least they can do
+        :param board: board to search from
+        :param isBlack: whether it is black to move
+        :return: bool
+        """
+        kingAndPawns = board.bitboard(King, isBlack) | board.bitboard(Pawn, isBlack)
+        if not board.colourBitboard(isBlack) & ~kingAndPawns:
+            return False
+        return not self._calculator.isInCheck(board, isBlack)
 
-                logging.debug(f'{spaces}DEPTH:{depth} [White] Returning {move} with score {score}')
-                return (score, move)
+    def _quiesce(self, alpha, beta, board, isBlack):
+        """
+        Quiescence search. Scoring a position straight after a capture, before the other side can take back, gives a
+        misleading score. So beyond the search depth only captures are searched, until there are none worth making.
+        The player to move can always choose not to capture so the score of the position as it stands is a lower bound.
+        :param alpha: best score the player to move is already guaranteed
+        :param beta: best score the opponent is already guaranteed, as a score for the player to move
+        :param board: board to search from
+        :param isBlack: whether it is black to move
+        :return: score for the player to move - between alpha and beta
+        """
+        standPat = -board.piecesScore() if isBlack else board.piecesScore()
+        if standPat >= beta:
+            return beta
+        alpha = max(alpha, standPat)
+        pieceAtLabel = board.pieceAtLabel
+        captures = [m for m in self._calculator.possibleMoves(board, isBlack) if pieceAtLabel(m.toSquare)]
+        make, unmake, quiesce = board.make, board.unmake, self._quiesce
+        for m in self._orderMoves(board, captures):
+            undo = make(m.fromSquare, m.toSquare)
+            score = -quiesce(-beta, -alpha, board, not isBlack)
+            unmake(undo)
+            if score >= beta:
+                return beta
+            alpha = max(alpha, score)
+        return alpha
+
+    def _orderMoves(self, board, moves, ttMove=None, depth=None):
+        """
+        Alpha-beta prunes most when the best move is searched first. So the best move found last time this position was
+        searched goes first, then captures - most valuable victim first, cheapest attacker first where victims are
+        equal - then the killer moves for the depth, then all other moves by their history score. Moves that tie keep
+        the order they were generated in.
+        :param board: board the moves are from
+        :param moves: moves to order
+        :param ttMove: best move from the transposition table, if any
+        :param depth: depth of the node in the search. If None killer moves are not used
+        :return: list of moves
+        """
+        ttSquares = (ttMove.fromSquare, ttMove.toSquare) if ttMove else None
+        killers = self._killers[depth] if depth is not None else (None, None)
+        history = self._history
+        pieceAtLabel = board.pieceAtLabel
+
+        def key(m):
+            squares = (m.fromSquare, m.toSquare)
+            victim = pieceAtLabel(m.toSquare)
+            if victim:
+                captureKey = (victim.BASE_SCORE, -pieceAtLabel(m.fromSquare).BASE_SCORE, 0, 0)
+            else:
+                captureKey = (0, 0, 2 if squares == killers[0] else 1 if squares == killers[1] else 0,
+                              history.get(squares, 0))
+            return (squares == ttSquares, captureKey)
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _addKiller(self, depth, move):
+        """
+        Records a move that isn't a capture but caused a cutoff. It becomes the first killer move for the depth and adds
+        to the history score of the move - more the further from the leaves as the cutoff saved more searching
+        :param depth: depth of the node the cutoff was at
+        :param move: move that caused the cutoff
+        """
+        squares = (move.fromSquare, move.toSquare)
+        killers = self._killers[depth]
+        if killers[0] != squares:
+            killers[1] = killers[0]
+            killers[0] = squares
+        remaining = self._searchDepth - depth
+        self._history[squares] = self._history.get(squares, 0) + remaining * remaining
+
+    def _searchMoves(self, depth, alpha, beta, board, isBlack, moves=None, ttMove=None):
+        """
+        Searches each of the moves in turn, the value returned by _bestScore before the transposition table is checked
+        :param depth: how far down the tree this node is
+        :param alpha: best score the player to move is already guaranteed
+        :param beta: best score the opponent is already guaranteed, as a score for the player to move
+        :param board: board to search from
+        :param isBlack: whether it is black to move
+        :param moves: moves to search. If None all moves for the player are searched
+        :param ttMove: best move found for this position by an earlier search, searched first
+        :return: tuple (score, move) - score for the player to move
+        """
+        # attributes used in the loop are looked up once. The spacing and colour are only needed when debugging
+        debug = self.__debug
+        if debug:
+            spaces = '  ' * depth
+            colour = 'Black' if isBlack else 'White'
+        make, unmake, bestScore = board.make, board.unmake, self._bestScore
+        childDepth, childIsBlack = depth + 1, not isBlack
+        availableMoves = self._orderMoves(board, moves if moves else self._calculator.possibleMoves(board, isBlack), ttMove,
+                                          depth)
+        score = -99999  # big negative number - so guaranteed all scores will be more than
+        move = None
+        for m in availableMoves:
+            if debug:
+                if depth == 0:
+                    self.moveCount += 1
+                    logging.debug(f'Move {self.moveCount} of {len(availableMoves)} moves: checking {m} ')
+                logging.debug(f'{spaces} Depth {depth} checking {colour} {m}')
+            undo = make(m.fromSquare, m.toSquare)
+            try:
+                newScore = -bestScore(childDepth, -beta, -alpha, board, childIsBlack)[0]
+            finally:
+                # always put the board back - the search stops by raising TimeoutError if it runs out of time
+                unmake(undo)
+
+            if newScore > score:
+                score = newScore
+                move = m
+
+            # alpha beta pruning
+            alpha = max(alpha, newScore)
+            if beta <= alpha:
+                if not board.pieceAtLabel(m.toSquare):
+                    # a quiet move good enough to cut off the search. Try it early in other positions too
+                    self._addKiller(depth, m)
+                break
+
+        if debug:
+            logging.debug(f'{spaces}DEPTH:{depth} [{colour}] Returning {move} with score {score}')
+        return (score, move)
 
 
 class AbstractHumanPlayer(AbstractPlayer):
+    __slots__ = ()
     def isHuman(self):
         return True
 
     def validateMove(self, move, board, moves, observable, incheck ):
-        # need to filter  moves for those that are allowed
-        availableMoves = [m for m in moves if not m.disallowed]
-        disallowedMoves = [m for m in moves if m.disallowed]
+        # need to split moves in to those that are allowed and those that aren't
+        availableMoves = []
+        disallowedMoves = []
+        for m in moves:
+            (disallowedMoves if m.disallowed else availableMoves).append(m)
         if move.upper() in {'Q', 'H', 'D', 'A'}:
             return move.upper()
-        fromTo = re.findall(board.movePattern(), move)
+        fromTo = board.movePattern().findall(move)
         if len(fromTo) > 1:
             fromTo = (fromTo[0].lower(), fromTo[1].lower())
             if len(fromTo) == 2:
@@ -355,7 +512,7 @@ class AbstractHumanPlayer(AbstractPlayer):
                 else:
                     # user typed something incorrect lets see if we can say something useful
                     piece = board.pieceAtLabel(fromTo[0])
-                    if piece == None:
+                    if piece is None:
                         observable.notify(
                             {ChessConstants.SHOW_WARNING: f'Please select a piece. {fromTo[0]} is an empty square '})
                     elif piece.isBlack() != self.isBlack:
@@ -375,6 +532,7 @@ class AbstractHumanPlayer(AbstractPlayer):
             observable.notify({ChessConstants.SHOW_WARNING: f'{move} is INVALID. Please try again...'})
 
 class HumanPlayerGUI(AbstractHumanPlayer):
+    __slots__ = ('chosenMove', 'promotePawnChoice')
 
     def __init__(self, isBlack, name='Human'):
         super().__init__(isBlack, name)
@@ -399,6 +557,7 @@ class HumanPlayerGUI(AbstractHumanPlayer):
         return self.promotePawnChoice
 
 class HumanPlayerTerminal(AbstractHumanPlayer):
+    __slots__ = ()
 
 
     def choseMove(self, board, moves, observable=None, incheck=False):
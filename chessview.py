@@ -2,24 +2,76 @@ import tkinter
 from observer import AbstractObserver, Observable
 from chessgame import ChessConstants, ChessMove
 from chesspieces import Pawn
-from boardgui import OutlineSquaresEvent, HighlightSquaresEvent, BoardCanvas
+from boardgui import OutlineSquaresEvent, SelectionChangedEvent, BoardCanvas
 from chessplayers import ChessPlayers
 import logging
 
+class SquareState:
+    """
+    A square on the board and the squares the piece on it can move to. ChessGUI has one for the square under the mouse
+    and one for the selected square. Squares are their index, r * size + c, in the board's grid
+    """
+    __slots__ = ('index', 'moveIndexes', 'moveMask')
+
+    def __init__(self):
+        self.clear()
+
+    def set(self, index, moves):
+        """
+        :param index: index of the square
+        :param moves: tuple (tuple of indexes of the squares the piece can move to, int with the bit for each set)
+        :return: None
+        """
+        self.index = index
+        self.moveIndexes, self.moveMask = moves
+
+    def clear(self):
+        self.index = BoardCanvas.OFF_BOARD
+        self.moveIndexes = ()
+        self.moveMask = 0
+
+    def canMoveTo(self, index):
+        return (self.moveMask >> index) & 1
+
+
 class ChessGUI( AbstractObserver, Observable):
 
     NEW_GAME = 'New Game'
     MAKE_MOVE = 'Make Move'
+    # milliseconds between handling mouse movements over the board
+    MOTION_INTERVAL = 16
+    # name of the method to call for each kind of event from the game. Events are dicts so each key is looked up once
+    # here rather than checking the event for every kind of key
+    EVENT_HANDLERS = {
+        ChessConstants.SHOW_WARNING:        'setFeedbackLabel',
+        ChessConstants.MOVE:                '_insertMoveText',
+        ChessConstants.WHITE_IN_CHECK:      '_showCheck',
+        ChessConstants.BLACK_IN_CHECK:      '_showCheck',
+        ChessConstants.WHITE_IN_CHECK_MATE: '_showCheck',
+        ChessConstants.BLACK_IN_CHECK_MATE: '_showCheck',
+        ChessConstants.STALEMATE:           '_showCheck',
+        ChessConstants.PROMOTION_DONE:      '_showPromotionDone',
+        ChessConstants.PAWN_PROMOTED:       '_showPawnPromoted',
+        ChessConstants.STATUS_CHANGE:       '_statusChanged',
+    }
 
     def __init__(self, size, root, testMode=False):
         Observable.__init__(self)
+        self._testMode = testMode
         self.pawnPromoted = False
         self._highlightMoves = tkinter.IntVar()
         self._highlightMoves.set(1)
-        self._mouseOverGridRef = None
-        self._mouseOverMoveGridRefs = []
-        self._selectedGridRef = None
-        self._selectedMoveGridRefs = []
+        # the square under the mouse and the selected square, along with the squares their pieces can move to
+        self._mouseOver = SquareState()
+        self._motionPending = None
+        self._lastMotionXY = None
+        self._selected = SquareState()
+        # (indexes, mask) of the squares each piece can move to, by the piece's index. Only valid until the game changes
+        self._availSqCache = {}
+        # the outline events for mouse movements are sent for every square the mouse passes over. Observers handle
+        # events as they're sent so the same two events are reused with their squares changed each time
+        self._outlineEvent = OutlineSquaresEvent((), False)
+        self._removeOutlineEvent = OutlineSquaresEvent((), False, True)
         self._player1Type = tkinter.StringVar()
         self._player1Type.set(ChessPlayers.HUMAN)
         self._player2Type = tkinter.StringVar()
@@ -42,84 +94,108 @@ class ChessGUI( AbstractObserver, Observable):
 
         self._moveText = tkinter.Text(root, width=20, state='disabled', wrap=tkinter.WORD, background=self.boardCanvas.colours[1])
         self._moveText.grid(row=0,column=0, sticky='nsew')
+        self._moveText.tag_configure('white', foreground='white')
 
         helpFrame = self._createHelpFrame(root)
         helpFrame.grid(row=0,column=2, sticky='nsew')
 
 
         # follow movements of the mouse
-        self.boardCanvas.bind('<Motion>', self.mouseMovement)
+        self.setHighlightMoves()
         self.boardCanvas.bind('<Button-1>', self.selectSquare)
 
     def setHighlightMoves(self):
-        if not self._highlightMoves.get():
+        # mouse movements are only followed while moves are being highlighted
+        if self._highlightMoves.get():
+            self.boardCanvas.bind('<Motion>', self.mouseMovement)
+        else:
+            self.boardCanvas.unbind('<Motion>')
+            if self._motionPending is not None:
+                self.boardCanvas.after_cancel(self._motionPending)
+                self._motionPending = None
             self.removeSelectedSquareHighlighting()
             self._removeMouseMovementOutlines()
 
     def selectSquare(self, event):
-        potentialMoveGridRef = self.boardCanvas.gridRefFromCoordinates(event.x, event.y)
-
-        # TESTING
-        pieceValue = self.controller.valueOfPiece(potentialMoveGridRef[0],potentialMoveGridRef[1])
-        logging.debug(f'Piece Value = {pieceValue}')
+        index = self.boardCanvas.indexFromCoordinates(event.x, event.y)
 
-        # END TESTING
+        if index != BoardCanvas.OFF_BOARD:
+            if self._testMode:
+                pieceValue = self.controller.valueOfPiece(*divmod(index, self.boardCanvas.size))
+                logging.debug(f'Piece Value = {pieceValue}')
 
-        if potentialMoveGridRef:
-            if potentialMoveGridRef == self._selectedGridRef:
+            selected = self._selected
+            if index == selected.index:
                 self.removeSelectedSquareHighlighting()
-            elif potentialMoveGridRef in set(self._selectedMoveGridRefs):
-                move = f'{self.boardCanvas.gridRefToLabel(self._selectedGridRef)}{self.boardCanvas.gridRefToLabel(potentialMoveGridRef)}'
+            elif selected.canMoveTo(index):
+                labels = self.boardCanvas.labels
+                move = labels[selected.index] + labels[index]
                 self.controller.makeMove(move)
                 self.removeSelectedSquareHighlighting()
                 self._removeMouseMovementOutlines()
                 self.controller.nextPlayer()
             else:
                 self.removeSelectedSquareHighlighting()
-                self._selectedGridRef = potentialMoveGridRef
-                self._selectedMoveGridRefs = []
-                availableSquares = self.controller.availableSquares(potentialMoveGridRef[0],potentialMoveGridRef[1])
-                if availableSquares:
-                    for s in availableSquares:
-                        self._selectedMoveGridRefs.append(tuple((s[0],s[1])))
+                selected.set(index, self._availableSquares(index))
 
-                self.notify(HighlightSquaresEvent([self._selectedGridRef]))
-                if self._highlightMoves.get() and len(self._selectedMoveGridRefs)>0:
-                    self.notify(OutlineSquaresEvent(self._selectedMoveGridRefs,True))
+                moveIndexes = selected.moveIndexes if self._highlightMoves.get() else ()
+                self.notify(SelectionChangedEvent(index, moveIndexes))
 
     def removeSelectedSquareHighlighting(self):
-        if self._selectedGridRef:
-            self.notify(HighlightSquaresEvent([self._selectedGridRef],True))
-            self._selectedGridRef = None
-        if len(self._selectedMoveGridRefs) > 0:
-            self.notify(OutlineSquaresEvent(self._selectedMoveGridRefs, True, True))
-            self._selectedMoveGridRefs = []
+        selected = self._selected
+        if selected.index != BoardCanvas.OFF_BOARD or selected.moveIndexes:
+            self.notify(SelectionChangedEvent(selected.index, selected.moveIndexes, True))
+            selected.clear()
 
     def mouseMovement(self,event):
-        if not self._highlightMoves.get(): return
-        gridRef = self.boardCanvas.gridRefFromCoordinates(event.x, event.y)
-        if gridRef:
-            if gridRef != self._mouseOverGridRef:
+        # Motion fires for every pixel the mouse moves. Just note where the mouse is and process the latest
+        # position once per MOTION_INTERVAL so the positions in between never reach the move generator
+        self._lastMotionXY = (event.x, event.y)
+        if self._motionPending is None:
+            self._motionPending = self.boardCanvas.after(self.MOTION_INTERVAL, self._processMotion)
+
+    def _processMotion(self):
+        self._motionPending = None
+        index = self.boardCanvas.indexFromCoordinates(*self._lastMotionXY)
+        if index != BoardCanvas.OFF_BOARD:
+            mouseOver = self._mouseOver
+            if index != mouseOver.index:
                 self._removeMouseMovementOutlines()
-                self._mouseOverGridRef = gridRef
-                self._mouseOverMoveGridRefs = []
-                availableSquares = self.controller.availableSquares(gridRef[0],gridRef[1])
-                if availableSquares:
-                    for m in availableSquares:
-                        self._mouseOverMoveGridRefs.append(tuple((m[0],m[1])))
-
-                self.notify(OutlineSquaresEvent([self._mouseOverGridRef],False))
-                if len(self._mouseOverMoveGridRefs)>0:
-                    self.notify(OutlineSquaresEvent(self._mouseOverMoveGridRefs,False))
+                mouseOver.set(index, self._availableSquares(index))
+
+                # the square under the mouse and the squares it can move to all get the outer outline
+                self._outlineEvent.indexes = (index,) + mouseOver.moveIndexes
+                self.notify(self._outlineEvent)
         else:
             # outside grid bounds to remove highlighting
             self._removeMouseMovementOutlines()
 
+    def _availableSquares(self, index):
+        """
+        Squares the piece on a square can move to. The same squares are asked for over and over as the mouse moves
+        back and forth over the board so they're kept till the game next changes
+        :param index: index of the square the piece is on
+        :return: tuple (tuple of indexes of the squares, int with the bit for each of these squares set)
+        """
+        squares = self._availSqCache.get(index)
+        if squares is None:
+            size = self.boardCanvas.size
+            availableSquares = self.controller.availableSquares(*divmod(index, size))
+            indexes = tuple(r * size + c for (r, c) in availableSquares) if availableSquares else ()
+            mask = 0
+            for i in indexes:
+                mask |= 1 << i
+            squares = self._availSqCache[index] = (indexes, mask)
+        return squares
+
     def _removeMouseMovementOutlines(self):
-        if self._mouseOverGridRef:
-            self.notify(OutlineSquaresEvent([self._mouseOverGridRef],False, True))
-        if len(self._mouseOverMoveGridRefs)>0:
-            self.notify(OutlineSquaresEvent(self._mouseOverMoveGridRefs,False,True))
+        mouseOver = self._mouseOver
+        indexes = mouseOver.moveIndexes
+        if mouseOver.index != BoardCanvas.OFF_BOARD:
+            indexes = (mouseOver.index,) + indexes
+        if indexes:
+            self._removeOutlineEvent.indexes = indexes
+            self.notify(self._removeOutlineEvent)
 
     def clearPlayerLabel(self):
         self.playerLabel.configure(text='')
@@ -135,41 +211,34 @@ class ChessGUI( AbstractObserver, Observable):
 
     def objectChanged(self, data):
         if isinstance(data, dict):
-            if ChessConstants.SHOW_WARNING in data:
-                self.setFeedbackLabel(data[ChessConstants.SHOW_WARNING])
-            if ChessConstants.MOVE in data:
-                self._insertMoveText(data[ChessConstants.MOVE])
-            if ChessConstants.WHITE_IN_CHECK in data:
-                self._insertMoveText(data[ChessConstants.WHITE_IN_CHECK])
-                self.setFeedbackLabel(data[ChessConstants.WHITE_IN_CHECK])
-            if ChessConstants.BLACK_IN_CHECK in data:
-                self._insertMoveText(data[ChessConstants.BLACK_IN_CHECK])
-                self.setFeedbackLabel(data[ChessConstants.BLACK_IN_CHECK])
-            if ChessConstants.WHITE_IN_CHECK_MATE in data:
-                self._insertMoveText(data[ChessConstants.WHITE_IN_CHECK_MATE])
-                self.setFeedbackLabel(data[ChessConstants.WHITE_IN_CHECK_MATE])
-            if ChessConstants.BLACK_IN_CHECK_MATE in data:
-                self.setFeedbackLabel(data[ChessConstants.BLACK_IN_CHECK_MATE])
-                self._insertMoveText(data[ChessConstants.BLACK_IN_CHECK_MATE])
-            if ChessConstants.STALEMATE in data:
-                self.setFeedbackLabel(data[ChessConstants.STALEMATE])
-                self._insertMoveText(data[ChessConstants.STALEMATE])
-            if ChessConstants.PROMOTION_DONE in data:
-                self._insertMoveText(str(data[ChessConstants.PROMOTION_DONE]))
-            if ChessConstants.PAWN_PROMOTED in data:
-                promotedPawn = data[ChessConstants.PAWN_PROMOTED]
-                if isinstance(promotedPawn, Pawn):
-                    colour = 'Black' if promotedPawn.isBlack() else 'White'
-                    self.setFeedbackLabel("Pawn promoted. Please chose 'Q', 'R', 'B', or 'K' (Queen, Rook, Bishop or Knight) ")
-            if ChessConstants.STATUS_CHANGE in data:
-                if data[ChessConstants.STATUS_CHANGE] == ChessConstants.STATUS_IN_PROGRESS:
-                    # disable drop downs - can't change player types during play
-                    self.pWhiteDropDown.configure(state=tkinter.DISABLED)
-                    self.pBlackDropDown.configure(state=tkinter.DISABLED)
-                else:
-                    self.pWhiteDropDown.configure(state=tkinter.NORMAL)
-                    self.pBlackDropDown.configure(state=tkinter.NORMAL)
-
+            # any event from the game may follow a change to the board so the cached squares are dropped
+            self._availSqCache.clear()
+            handlers = ChessGUI.EVENT_HANDLERS
+            for key, value in data.items():
+                handler = handlers.get(key)
+                if handler:
+                    getattr(self, handler)(value)
+
+    def _showCheck(self, text):
+        # check, check mate and stalemate are shown in the list of moves and as feedback
+        self._insertMoveText(text)
+        self.setFeedbackLabel(text)
+
+    def _showPromotionDone(self, move):
+        self._insertMoveText(str(move))
+
+    def _showPawnPromoted(self, promotedPawn):
+        if isinstance(promotedPawn, Pawn):
+            self.setFeedbackLabel("Pawn promoted. Please chose 'Q', 'R', 'B', or 'K' (Queen, Rook, Bishop or Knight) ")
+
+    def _statusChanged(self, status):
+        if status == ChessConstants.STATUS_IN_PROGRESS:
+            # disable drop downs - can't change player types during play
+            self.pWhiteDropDown.configure(state=tkinter.DISABLED)
+            self.pBlackDropDown.configure(state=tkinter.DISABLED)
+        else:
+            self.pWhiteDropDown.configure(state=tkinter.NORMAL)
+            self.pBlackDropDown.configure(state=tkinter.NORMAL)
 
     def _start(self):
         self.controller.nextPlayer()
@@ -217,15 +286,23 @@ class ChessGUI( AbstractObserver, Observable):
         self.controller.setPlayer2(self._player2Type.get(), self.__player2Level())
 
     def __player1Level(self):
-        try:
-            return int(self.whiteLevel.get())
-        except:
-            return 1
+        return self._whiteLevelInt
 
     def __player2Level(self):
+        return self._blackLevelInt
+
+    def _whiteLevelEdited(self, *args):
+        # the level is parsed as the entry is edited so asking for it doesn't go to Tcl
+        self._whiteLevelInt = self.__levelFromText(self._whiteLevelText.get())
+
+    def _blackLevelEdited(self, *args):
+        self._blackLevelInt = self.__levelFromText(self._blackLevelText.get())
+
+    def __levelFromText(self, text):
+        # validation only lets digits in to the entries but they can be left empty
         try:
-            return int(self.blackLevel.get())
-        except:
+            return int(text)
+        except ValueError:
             return 1
 
     def __levelValidation(self, S):
@@ -237,19 +314,20 @@ class ChessGUI( AbstractObserver, Observable):
             return False
 
     def _insertMoveText(self, someText):
+        # newest move goes at the end. Inserting at the start makes Tk shift every line already in the widget
         self._moveText.configure(state=tkinter.NORMAL)
-        self._moveText.insert(1.0, '\n')
+        prefix = f'{self.controller.moveCount()}: '
         text = str(someText)
-        self._moveText.insert(1.0, text)
-        if isinstance(someText, ChessMove):
-            if not someText.isBlack():
-                self._moveText.tag_add('white', '1.0', f'1.{str(len(text))}')
-                self._moveText.tag_configure('white', foreground='white')
-        self._moveText.insert(1.0, f'{self.controller.moveCount()}: ')
+        if isinstance(someText, ChessMove) and not someText.isBlack():
+            self._moveText.insert(tkinter.END, prefix, '', text, 'white', '\n')
+        else:
+            self._moveText.insert(tkinter.END, f'{prefix}{text}\n')
+        self._moveText.see(tkinter.END)
         self._moveText.configure(state=tkinter.DISABLED)
 
     def _newGame(self):
         self.controller.newGame()
+        self._availSqCache.clear()
         self.setHelpText('')
         self._moveText.configure(state=tkinter.NORMAL)
         self._moveText.delete(1.0, tkinter.END)
@@ -262,9 +340,13 @@ class ChessGUI( AbstractObserver, Observable):
         self.setHelpText(self.controller.getHelp())
 
     def setHelpText(self, someText):
+        # the same text is often set again, eg clearing help that is already empty on a new game, so the widget is
+        # only changed when the text is different
+        if someText == self._helpTextShown:
+            return
+        self._helpTextShown = someText
         self._helpText.configure(state=tkinter.NORMAL)
-        self._helpText.delete(1.0, tkinter.END)
-        self._helpText.insert(tkinter.END, someText)
+        self._helpText.replace(1.0, tkinter.END, someText)
         self._helpText.configure(state=tkinter.DISABLED)
 
     def _makeMove(self):
@@ -294,18 +376,24 @@ class ChessGUI( AbstractObserver, Observable):
         #         '%d', '%i', '%P', '%s', '%S', '%v', '%V', '%W')
         validationCMD = (frame.register(self.__levelValidation),'%S')
 
-        self.whiteLevel = tkinter.Entry(frame, width=5, validate='key', validatecommand=validationCMD)
+        self._whiteLevelInt = 1
+        self._whiteLevelText = tkinter.StringVar(value='1')
+        self._whiteLevelText.trace_add('write', self._whiteLevelEdited)
+        self.whiteLevel = tkinter.Entry(frame, width=5, validate='key', validatecommand=validationCMD,
+                                        textvariable=self._whiteLevelText)
         self.whiteLevel.grid(row=1, column=2, sticky= tkinter.N + tkinter.S + tkinter.E + tkinter.W)
         self.whiteLevel.bind('<FocusOut>', self._player1LevelChanged)
         self.whiteLevel.bind('<Return>', self._player1LevelChanged)
-        self.whiteLevel.insert(0,'1')
         self.whiteLevel.configure(state=tkinter.DISABLED)
 
-        self.blackLevel = tkinter.Entry(frame, width=5, validate='key', validatecommand=validationCMD)
+        self._blackLevelInt = 1
+        self._blackLevelText = tkinter.StringVar(value='1')
+        self._blackLevelText.trace_add('write', self._blackLevelEdited)
+        self.blackLevel = tkinter.Entry(frame, width=5, validate='key', validatecommand=validationCMD,
+                                        textvariable=self._blackLevelText)
         self.blackLevel.grid(row=2, column=2, sticky= tkinter.N + tkinter.S + tkinter.E + tkinter.W)
         self.blackLevel.bind('<FocusOut>', self._player2LevelChanged)
         self.blackLevel.bind('<Return>', self._player2LevelChanged)
-        self.blackLevel.insert(0,'1')
         self.blackLevel.configure(state=tkinter.DISABLED)
 
         self._startButton = tkinter.Button(frame, text='START', command=self._start, state=tkinter.DISABLED)
@@ -328,5 +416,6 @@ class ChessGUI( AbstractObserver, Observable):
 
         self._helpText = tkinter.Text(frame, width=30, state=tkinter.DISABLED, wrap=tkinter.WORD, background=self.boardCanvas.colours[1])
         self._helpText.grid(row=5, columnspan=3, sticky='nsew')
+        self._helpTextShown = ''
         return frame
 
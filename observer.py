@@ -5,6 +5,7 @@ by Erich Gamma, Richard Helm, Ralph Johnson, John Vlissides - The 'Gang Of Four'
 
 from abc import ABC, abstractmethod
 import logging
+import weakref
 
 class AbstractObservable(ABC):
 
@@ -19,6 +20,8 @@ class AbstractObservable(ABC):
         pass
 
 class AbstractObserver(ABC):
+    # observables hold their observers by weak reference so slotted observers need a slot for it
+    __slots__ = ('__weakref__',)
 
     @abstractmethod
     def objectChanged(self, data):
@@ -26,17 +29,27 @@ class AbstractObserver(ABC):
 
 class Observable(AbstractObservable):
     def __init__(self):
-        self._observers = set()
+        # observers are held by weak reference so being observed doesn't keep an observer alive or tie it in to a
+        # reference cycle. Whoever creates an observer keeps hold of it for as long as it should get events
+        self._observers = weakref.WeakSet()
+        # observers are added once but notified many times so notify iterates a tuple of references kept in step
+        # with the set
+        self._observerRefs = ()
 
     def addObserver(self, observer):
         self._observers.add(observer)
+        self._observerRefs = tuple(weakref.ref(o) for o in self._observers)
 
     def removeObserver(self, observer):
         try:
             self._observers.remove(observer)
+            self._observerRefs = tuple(weakref.ref(o) for o in self._observers)
         except:
             logging.warning(f'{self._observers} does not contain {observer} so cannot remove it')
 
     def notify(self, data):
-        for o in self._observers:
-            o.objectChanged(data)
+        for ref in self._observerRefs:
+            o = ref()
+            # an observer that has since been garbage collected is skipped
+            if o is not None:
+                o.objectChanged(data)